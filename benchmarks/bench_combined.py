@@ -0,0 +1,66 @@
+"""Size and render time of one combined PDF against one PDF per user.
+
+Run from the directory holding config.ini and fonts/:
+
+    python benchmarks/bench_combined.py [--users 200]
+
+The same synthetic users, each holding a few assets and accessories, are
+rendered once as separate documents with inventory_pdf.render_pdf and once
+as a single volume with inventory_pdf.render_volume. Nothing is written
+to disk, sizes are those of the PDFs in memory.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import snipeit_inv_sign  # noqa: E402
+import inventory_pdf  # noqa: E402
+from snipeit_api import AssetRow, AccessoryRow  # noqa: E402
+
+
+def documents(count):
+    """Returns the render_pdf arguments of count users holding one to five items of each kind."""
+    rng = random.Random(1)
+    users = []
+    for user_id in range(1, count + 1):
+        assets = [AssetRow(f'A{user_id:05d}-{k}', f'Laptop {k}', 'Latitude 5440', f'SN{user_id:05d}{k}') for k in range(rng.randint(1, 5))]
+        accessories = [AccessoryRow(rng.randint(1, 30), 'Docking station') for _ in range(rng.randint(1, 5))]
+        users.append((f'User {user_id}', f'user{user_id}@example.com', user_id, assets, accessories))
+    return users
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200, help='users rendered (default: 200)')
+    args = parser.parse_args()
+
+    snipeit_inv_sign.load_config()
+    inventory_pdf.configure(**snipeit_inv_sign.pdf_settings())
+    template = inventory_pdf.get_template()
+    users = documents(args.users)
+
+    # render_pdf reports the signature fields of every document, keep the benchmark output readable
+    with open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            start = time.perf_counter()
+            separate = sum(len(inventory_pdf.render_pdf(*user, template=template)) for user in users)
+            separate_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            combined = len(inventory_pdf.render_volume(users, template=template))
+            combined_seconds = time.perf_counter() - start
+        finally:
+            sys.stdout = stdout
+
+    print(f"{args.users} users")
+    print(f"separate: {separate / 1024:9.0f} KB {separate_seconds:7.2f} s")
+    print(f"combined: {combined / 1024:9.0f} KB {combined_seconds:7.2f} s")
+    print(f"combined is {combined / separate:.0%} of the size and {combined_seconds / separate_seconds:.0%} of the time")
+
+
+if __name__ == '__main__':
+    main()
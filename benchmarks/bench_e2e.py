@@ -0,0 +1,176 @@
+"""End-to-end throughput of snipeit_inv_sign.py and transfer.py against mock_snipeit.
+
+Run from the directory holding config.ini and fonts/:
+
+    python benchmarks/bench_e2e.py --users 10000 --latency 0.005 --json run.json
+    python benchmarks/bench_e2e.py --users 10000 --latency 0.005 --baseline run.json
+
+The mock server runs in this process on a free port. Each flow runs the
+real tool in a child process inside a temporary directory, with a copy of
+config.ini pointed at the mock, the response cache off and the rate limit
+off unless --rate is given. Reported per flow:
+
+    seconds, API requests, requests per user (per move for transfer),
+    documents per second and the peak RSS of the tool's main process.
+
+--json saves the results, --baseline prints the change against saved ones.
+"""
+import argparse
+import configparser
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import mock_snipeit  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FLOWS = ['inventory', 'bulk', 'delta', 'transfer']
+
+
+def run_tool(args, cwd):
+    """Runs a tool to completion and returns its wall time in seconds and peak RSS in MB."""
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull:
+        process = subprocess.Popen([sys.executable] + args, cwd=cwd, stdout=devnull, stderr=subprocess.PIPE, text=True)
+        if hasattr(os, 'wait4'):
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+            rss = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+        else:
+            process.wait()
+            rss = None
+        errors = process.stderr.read()
+    seconds = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{errors}")
+    return seconds, rss
+
+
+def write_config(workdir, port, rate):
+    """Copies config.ini and fonts/ into workdir, pointing the copy at the mock server."""
+    config = configparser.ConfigParser()
+    if not config.read('config.ini'):
+        sys.exit('Run from the directory holding config.ini and fonts/')
+    config['DEFAULT']['api_endpoint'] = f'http://127.0.0.1:{port}/api/v1'
+    config['DEFAULT']['api_token'] = 'benchmark'
+    config['DEFAULT']['requests_per_minute'] = str(rate)
+    if not config.has_section('Cache'):
+        config.add_section('Cache')
+    config['Cache']['enabled'] = 'no'
+    with open(os.path.join(workdir, 'config.ini'), 'w') as f:
+        config.write(f)
+    shutil.copytree('fonts', os.path.join(workdir, 'fonts'))
+
+
+def clear_documents(workdir):
+    for name in os.listdir(workdir):
+        if name.endswith('_inventory.pdf'):
+            os.remove(os.path.join(workdir, name))
+
+
+def count_documents(workdir):
+    return sum(1 for name in os.listdir(workdir) if name.endswith('_inventory.pdf'))
+
+
+def transfer_pairs(mock, count):
+    """Returns sender/receiver pairs for the users holding the most accessories."""
+    holders = sorted(mock.by_user, key=lambda user_id: -len(mock.by_user[user_id]))[:count]
+    return [{'sender': str(sender), 'receiver': str(sender % len(mock.users) + 1)} for sender in holders]
+
+
+def measure(mock, flow, workdir, args):
+    """Runs one flow and returns its results."""
+    sign = [os.path.join(ROOT, 'snipeit_inv_sign.py'), '--no-cache', '--force']
+    if args.render_processes is not None:
+        sign += ['--render-processes', str(args.render_processes)]
+
+    if flow == 'delta':
+        # Start from the current end of the activity log, then change a few users
+        with open(os.path.join(workdir, 'feed_state.json'), 'w') as f:
+            json.dump({'high_water': len(mock.activity), 'pending': []}, f)
+        for pair in transfer_pairs(mock, args.pairs):
+            user_id = int(pair['sender'])
+            for pivot_id in list(mock.by_user.get(user_id, {}))[:1]:
+                mock.post(f'/accessories/{pivot_id}/checkin', {})
+
+    clear_documents(workdir)
+    mock.reset_counters()
+    if flow == 'inventory':
+        seconds, rss = run_tool(sign + ['--all'], workdir)
+    elif flow == 'bulk':
+        seconds, rss = run_tool(sign + ['--all', '--bulk'], workdir)
+    elif flow == 'delta':
+        seconds, rss = run_tool(sign + ['--delta'], workdir)
+    else:
+        pairs = transfer_pairs(mock, args.pairs)
+        moves = sum(len(mock.by_user.get(int(pair['sender']), {})) for pair in pairs)
+        with open(os.path.join(workdir, 'pairs.json'), 'w') as f:
+            json.dump(pairs, f)
+        seconds, rss = run_tool([
+            os.path.join(ROOT, 'transfer.py'), '--manifest', 'pairs.json', '-y', '--no-cache',
+            '--journal', os.path.join(workdir, 'journal.jsonl'),
+        ], workdir)
+
+    requests = mock.total_requests()
+    if flow == 'transfer':
+        return {'seconds': seconds, 'requests': requests, 'per_unit': requests / max(moves, 1),
+                'unit': 'move', 'moves': moves, 'per_second': moves / seconds, 'rss_mb': rss}
+    documents = count_documents(workdir)
+    return {'seconds': seconds, 'requests': requests, 'per_unit': requests / max(documents, 1),
+            'unit': 'document', 'documents': documents, 'per_second': documents / seconds, 'rss_mb': rss}
+
+
+def change(new, old):
+    if not old:
+        return ''
+    return f' ({(new - old) / old * 100:+.0f}%)'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end benchmark of the tools against a mock Snipe-IT.')
+    mock_snipeit.add_arguments(parser)
+    parser.add_argument('--flows', default=','.join(FLOWS), help=f'comma separated flows to run (default: {",".join(FLOWS)})')
+    parser.add_argument('--pairs', type=int, default=20, help='sender/receiver pairs moved by the transfer flow (default: 20)')
+    parser.add_argument('--render-processes', type=int, help='passed to snipeit_inv_sign.py')
+    parser.add_argument('--rate', type=int, default=0, help='requests_per_minute of the tools, 0 for none (default: 0)')
+    parser.add_argument('--json', help='save the results to this file')
+    parser.add_argument('--baseline', help='results saved by an earlier --json run to compare with')
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['flows']
+
+    mock = mock_snipeit.from_arguments(args)
+    server = mock_snipeit.start_server(mock)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        write_config(workdir, server.server_port, args.rate)
+        print(f"{args.users} users, {len(mock.hardware)} assets, {len(mock.checkouts)} accessory checkouts")
+        for flow in args.flows.split(','):
+            result = measure(mock, flow, workdir, args)
+            results[flow] = result
+            old = baseline.get(flow, {})
+            rss = f"{result['rss_mb']:.0f} MB" if result['rss_mb'] is not None else 'n/a'
+            print(f"{flow}:")
+            print(f"    {result['seconds']:.2f} s{change(result['seconds'], old.get('seconds'))}")
+            print(f"    {result['requests']} requests{change(result['requests'], old.get('requests'))}, "
+                  f"{result['per_unit']:.2f} per {result['unit']}")
+            print(f"    {result['per_second']:.1f} {result['unit']}s/s{change(result['per_second'], old.get('per_second'))}")
+            print(f"    peak RSS {rss}{change(result['rss_mb'] or 0, old.get('rss_mb'))}")
+    server.shutdown()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'arguments': vars(args), 'flows': results}, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
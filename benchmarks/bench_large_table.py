@@ -0,0 +1,61 @@
+"""Layout time of a document holding thousands of items, measured and fixed-size tables.
+
+Run from the directory holding config.ini and fonts/:
+
+    python benchmarks/bench_large_table.py [rows ...]
+
+Each size is rendered once with every table measured by ReportLab and once
+with the fixed-size LongTable used above large_table_rows. The layout,
+signature and total times are printed. The PDFs are written to a
+temporary directory.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import snipeit_inv_sign  # noqa: E402
+import inventory_pdf  # noqa: E402
+from snipeit_api import AssetRow, AccessoryRow  # noqa: E402
+from snipeit_metrics import metrics  # noqa: E402
+
+
+def render(rows, large_table_rows):
+    """Renders one document with rows assets and a fifth as many accessories, returning its stage timings."""
+    assets = [AssetRow(f'T{k:05d}', f'Laptop {k}', 'Latitude 5440', f'SN{k:07d}') for k in range(rows)]
+    accessories = [AccessoryRow(k % 30, f'Accessory {k % 30}') for k in range(rows // 5)]
+    inventory_pdf.configure(large_table_rows=large_table_rows)
+    metrics.drain()
+    start = time.perf_counter()
+    inventory_pdf.generate_pdf('Pool User', 'pool@example.com', 1, assets, accessories)
+    total = time.perf_counter() - start
+    stages = metrics.drain()['stages']
+    return total, stages['layout'][1], stages['signature'][1]
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [500, 1500, 3000]
+    snipeit_inv_sign.load_config()
+    inventory_pdf.configure(**snipeit_inv_sign.pdf_settings())
+    inventory_pdf.get_template()
+
+    results = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        os.chdir(out_dir)
+        # generate_pdf reports every document, keep the benchmark output readable
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                for rows in sizes:
+                    results.append((rows, render(rows, rows + 1), render(rows, 0)))
+            finally:
+                sys.stdout = stdout
+
+    print(f"{'rows':>6}  {'measured layout':>16}  {'fixed layout':>13}  {'signature':>10}  {'total':>14}")
+    for rows, measured, fixed in results:
+        print(f"{rows:>6}  {measured[1]:>15.2f}s  {fixed[1]:>12.2f}s  {fixed[2]:>9.2f}s  {measured[0]:>6.2f}s/{fixed[0]:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
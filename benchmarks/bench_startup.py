@@ -0,0 +1,68 @@
+"""Import time of the tools, to keep their startup fast.
+
+Run from the repository or any directory:
+
+    python benchmarks/bench_startup.py [--budget-ms 150]
+
+Each module is imported in a fresh interpreter with python -X importtime,
+and the cumulative time of the module and its heaviest imports is printed.
+reportlab, pyhanko and requests should not appear: they load on first use.
+With --budget-ms the exit code is 1 when a module takes longer to import.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ['snipeit_inv_sign', 'transfer', 'snipeit_api']
+# Imports that have to stay lazy
+HEAVY = ('reportlab', 'pyhanko', 'requests', 'urllib3', 'inventory_pdf')
+
+
+def import_times(module, baseline=()):
+    """Returns {imported module: cumulative microseconds} of importing module in a new interpreter.
+
+    Modules named in baseline, the ones the interpreter loads at startup, are left out.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}' if module else 'pass'],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.strip() not in baseline:
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, help='fail when a module takes longer to import')
+    parser.add_argument('--top', type=int, default=5, help='heaviest imports listed per module')
+    args = parser.parse_args()
+
+    baseline = import_times(None)
+    over_budget = False
+    for module in MODULES:
+        times = import_times(module, baseline)
+        total = times[module] / 1000
+        print(f"{module}: {total:.1f} ms")
+        nested = sorted(((us, name) for name, us in times.items() if name != module), reverse=True)
+        for us, name in nested[:args.top]:
+            print(f"    {us / 1000:7.1f} ms  {name}")
+        heavy = sorted(name for name in times if name.split('.')[0] in HEAVY)
+        if heavy:
+            print(f"    loaded eagerly: {', '.join(heavy[:5])}")
+        if args.budget_ms is not None and total > args.budget_ms:
+            print(f"    over the {args.budget_ms:.0f} ms budget")
+            over_budget = True
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Per-document render time with and without the shared InventoryTemplate.
+
+Run from the directory holding config.ini and fonts/:
+
+    python benchmarks/bench_template.py [users]
+
+"Before" builds a new template for every document, which is the work
+generate_pdf used to repeat per call. "After" reuses one template for the
+whole batch. The PDFs are written to a temporary directory.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import snipeit_inv_sign  # noqa: E402
+import inventory_pdf  # noqa: E402
+from snipeit_api import AssetRow, AccessoryRow  # noqa: E402
+
+
+def synthetic_user(i):
+    """Returns the generate_pdf arguments for a user holding a few items."""
+    assets = [AssetRow(f'T{i}-{k}', f'Laptop {k}', 'Latitude 5440', f'SN{i:05d}{k}') for k in range(i % 4)]
+    accessories = [AccessoryRow(k, f'Accessory {k}') for k in range(i % 3)]
+    return f'Bench User {i}', f'user{i}@example.com', i, assets, accessories
+
+
+def run(users, shared_template):
+    template = inventory_pdf.get_template() if shared_template else None
+    start = time.perf_counter()
+    for user in users:
+        if shared_template:
+            inventory_pdf.generate_pdf(*user, template=template)
+        else:
+            inventory_pdf.generate_pdf(*user, template=inventory_pdf.InventoryTemplate())
+    return (time.perf_counter() - start) / len(users)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    users = [synthetic_user(i) for i in range(count)]
+    snipeit_inv_sign.load_config()
+    inventory_pdf.configure(**snipeit_inv_sign.pdf_settings())
+    inventory_pdf.register_fonts()
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        os.chdir(out_dir)
+        # generate_pdf reports every document, keep the benchmark output readable
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                before = run(users, shared_template=False)
+                after = run(users, shared_template=True)
+            finally:
+                sys.stdout = stdout
+
+    print(f"{count} users")
+    print(f"before (template per document): {before * 1000:.2f} ms/document")
+    print(f"after (shared template):        {after * 1000:.2f} ms/document")
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
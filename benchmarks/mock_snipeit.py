@@ -0,0 +1,290 @@
+"""Local stand-in for the parts of the Snipe-IT API used by the tools.
+
+Serves a synthetic tenant over HTTP so the tools can be measured without
+touching a real server:
+
+    python benchmarks/mock_snipeit.py --users 10000 --port 8765
+
+then point api_endpoint in config.ini at http://127.0.0.1:8765/api/v1.
+bench_e2e.py starts the same server in-process.
+
+Inventories are skewed: most users hold one to three items and a few hold
+many, like a real tenant. Latency, the page size limit and the share of
+requests answered with 429 Too Many Requests are configurable. Checkins
+and checkouts change the served data, so transfers can be replayed.
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import argparse
+import threading
+import random
+import json
+import time
+import re
+
+
+class MockSnipeIT:
+    """Synthetic Snipe-IT tenant and the request counters of the server.
+
+    Keyword Arguments:
+        users {int} -- number of users (default: {1000})
+        accessory_types {int} -- number of distinct accessories (default: {50})
+        skew {float} -- Pareto shape of the items held per user, lower is more skewed (default: {1.5})
+        latency {float} -- seconds added to every response (default: {0})
+        max_page {int} -- largest page the server returns (default: {500})
+        throttle {float} -- share of requests answered with 429 (default: {0})
+        seed {int} -- random seed of the generated data (default: {1})
+    """
+    def __init__(self, users=1000, accessory_types=50, skew=1.5, latency=0.0, max_page=500, throttle=0.0, seed=1):
+        self.latency = latency
+        self.max_page = max_page
+        self.throttle = throttle
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = {}
+
+        rng = random.Random(seed)
+        self.users = []
+        self.assets = {}
+        for user_id in range(1, users + 1):
+            email = f'user{user_id}@example.com' if user_id % 20 else ''
+            department = {'id': user_id % 7 + 1, 'name': f'Department {user_id % 7 + 1}'} if user_id % 11 else None
+            self.users.append({'id': user_id, 'name': f'User {user_id} &amp; Co', 'email': email, 'department': department})
+            self.assets[user_id] = [
+                self._asset(user_id, k) for k in range(self._held(rng, skew))
+            ]
+        self.users_by_id = {user['id']: user for user in self.users}
+        self.hardware = [asset for user in self.users for asset in self.assets[user['id']]]
+
+        self.accessories = [{'id': a, 'name': f'Accessory {a}'} for a in range(1, accessory_types + 1)]
+        self.checkouts = {}  # pivot ID: (accessory ID, user ID)
+        self.by_user = {}  # user ID: {pivot ID: accessory ID}
+        self.by_accessory = {}  # accessory ID: {pivot ID: user ID}
+        self._next_pivot = 1
+        for user in self.users:
+            for _ in range(self._held(rng, skew)):
+                self._checkout(rng.choice(self.accessories)['id'], user['id'])
+
+        self.activity = []
+
+    @staticmethod
+    def _held(rng, skew):
+        return min(int(rng.paretovariate(skew)) - 1 + rng.randint(0, 2), 200)
+
+    @staticmethod
+    def _asset(user_id, k):
+        return {
+            'id': user_id * 1000 + k,
+            'asset_tag': f'A{user_id:06d}-{k}',
+            'name': f'Laptop {k}',
+            'model': {'name': 'Latitude &quot;5440&quot;'},
+            'serial': f'SN{user_id:06d}{k}',
+            'status_label': {'status_meta': 'deployed'},
+            'assigned_to': {'id': user_id, 'type': 'user'},
+        }
+
+    def _checkout(self, accessory_id, user_id):
+        pivot_id = self._next_pivot
+        self._next_pivot += 1
+        self.checkouts[pivot_id] = (accessory_id, user_id)
+        self.by_user.setdefault(user_id, {})[pivot_id] = accessory_id
+        self.by_accessory.setdefault(accessory_id, {})[pivot_id] = user_id
+        return pivot_id
+
+    def _checkin(self, pivot_id):
+        checkout = self.checkouts.pop(pivot_id, None)
+        if checkout is not None:
+            accessory_id, user_id = checkout
+            del self.by_user[user_id][pivot_id]
+            del self.by_accessory[accessory_id][pivot_id]
+        return checkout
+
+    def count(self, kind):
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = {}
+
+    def total_requests(self):
+        with self._lock:
+            return sum(self.requests.values())
+
+    def throttled(self):
+        with self._lock:
+            return self.throttle > 0 and self._rng.random() < self.throttle
+
+    def page(self, rows, query):
+        offset = int(query.get('offset', ['0'])[0])
+        limit = min(int(query.get('limit', ['50'])[0]), self.max_page)
+        return {'total': len(rows), 'rows': rows[offset:offset + limit]}
+
+    def user_accessories(self, user_id):
+        with self._lock:
+            names = {a['id']: a['name'] for a in self.accessories}
+            return [
+                {'id': accessory_id, 'name': names[accessory_id]}
+                for accessory_id in self.by_user.get(user_id, {}).values()
+            ]
+
+    def holders(self, accessory_id):
+        with self._lock:
+            return [
+                {'id': user_id, 'name': self.users_by_id[user_id]['name'], 'assigned_pivot_id': pivot_id}
+                for pivot_id, user_id in self.by_accessory.get(accessory_id, {}).items()
+            ]
+
+    def get(self, path, query):
+        """Returns the status code and body of a GET request."""
+        if path == '/users':
+            rows = self.users
+            if 'search' in query:
+                term = query['search'][0].lower()
+                rows = [u for u in rows if term in u['name'].lower() or term in u['email'].lower() or term == str(u['id'])]
+            return 200, self.page(rows, query)
+        match = re.fullmatch(r'/users/(\d+)', path)
+        if match:
+            user = self.users_by_id.get(int(match.group(1)))
+            return 200, user or {'status': 'error', 'messages': 'User not found', 'payload': None}
+        match = re.fullmatch(r'/users/(\d+)/assets', path)
+        if match:
+            rows = self.assets.get(int(match.group(1)), [])
+            return 200, {'total': len(rows), 'rows': rows}
+        match = re.fullmatch(r'/users/(\d+)/accessories', path)
+        if match:
+            rows = self.user_accessories(int(match.group(1)))
+            return 200, {'total': len(rows), 'rows': rows}
+        match = re.fullmatch(r'/accessories/(\d+)/checkedout', path)
+        if match:
+            return 200, self.page(self.holders(int(match.group(1))), query)
+        if path == '/accessories':
+            return 200, self.page(self.accessories, query)
+        if path == '/hardware':
+            return 200, self.page(self.hardware, query)
+        if path == '/reports/activity':
+            with self._lock:
+                rows = sorted(self.activity, key=lambda entry: -entry['id'])
+            return 200, self.page(rows, query)
+        return 404, {'status': 'error', 'messages': 'Not found', 'payload': None}
+
+    def post(self, path, body):
+        """Returns the status code and body of a POST request."""
+        match = re.fullmatch(r'/accessories/(\d+)/checkin', path)
+        if match:
+            with self._lock:
+                checkout = self._checkin(int(match.group(1)))
+                if checkout is None:
+                    return 200, {'status': 'error', 'messages': 'Not checked out', 'payload': None}
+                self._log('checkin from', checkout)
+            return 200, {'status': 'success', 'messages': 'Checked in', 'payload': None}
+        match = re.fullmatch(r'/accessories/(\d+)/checkout', path)
+        if match:
+            user_id = int(body.get('assigned_to', 0))
+            if user_id not in self.users_by_id:
+                return 200, {'status': 'error', 'messages': 'User not found', 'payload': None}
+            with self._lock:
+                checkout = (int(match.group(1)), user_id)
+                self._checkout(*checkout)
+                self._log('checkout', checkout)
+            return 200, {'status': 'success', 'messages': 'Checked out', 'payload': None}
+        return 404, {'status': 'error', 'messages': 'Not found', 'payload': None}
+
+    def _log(self, action, checkout):
+        accessory_id, user_id = checkout
+        self.activity.append({
+            'id': len(self.activity) + 1,
+            'action_type': action,
+            'item': {'id': accessory_id, 'type': 'accessory'},
+            'target': {'id': user_id, 'type': 'user'},
+        })
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes, without this keep-alive requests stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self, status, body, headers=()):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def handle_request(self, method):
+        mock = self.server.mock
+        url = urlparse(self.path)
+        path = url.path.replace('/api/v1', '', 1).rstrip('/')
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+        mock.count(method)
+        if mock.latency:
+            time.sleep(mock.latency)
+        if mock.throttled():
+            return self.respond(429, {'status': 'error', 'messages': 'Too Many Requests.'}, [('Retry-After', '0')])
+        if method == 'GET':
+            status, payload = mock.get(path, parse_qs(url.query))
+        else:
+            status, payload = mock.post(path, body)
+        self.respond(status, payload)
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+
+def start_server(mock, host='127.0.0.1', port=0):
+    """Serves mock on a background thread and returns the server, its port is server.server_port."""
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    server.daemon_threads = True
+    server.mock = mock
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_arguments(parser):
+    """Adds the options describing the synthetic tenant to parser."""
+    parser.add_argument('--users', type=int, default=1000, help='number of users (default: 1000)')
+    parser.add_argument('--accessory-types', type=int, default=50, help='number of distinct accessories (default: 50)')
+    parser.add_argument('--skew', type=float, default=1.5, help='Pareto shape of items per user, lower is more skewed (default: 1.5)')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response (default: 0)')
+    parser.add_argument('--max-page', type=int, default=500, help='largest page returned (default: 500)')
+    parser.add_argument('--throttle', type=float, default=0.0, help='share of requests answered with 429 (default: 0)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed of the generated data (default: 1)')
+
+
+def from_arguments(args):
+    """Builds the MockSnipeIT described by the options of add_arguments."""
+    return MockSnipeIT(
+        users=args.users, accessory_types=args.accessory_types, skew=args.skew,
+        latency=args.latency, max_page=args.max_page, throttle=args.throttle, seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a synthetic Snipe-IT API.')
+    add_arguments(parser)
+    parser.add_argument('--port', type=int, default=8765, help='port to listen on (default: 8765)')
+    args = parser.parse_args()
+
+    server = start_server(from_arguments(args), port=args.port)
+    print(f"Serving {args.users} users on http://127.0.0.1:{server.server_port}/api/v1, Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
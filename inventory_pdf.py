@@ -0,0 +1,759 @@
+from reportlab.platypus import SimpleDocTemplate, Flowable, Paragraph, Table, LongTable, TableStyle, PageBreak
+from pyhanko.sign.fields import SigFieldSpec, append_signature_field
+from pyhanko.pdf_utils.incremental_writer import IncrementalPdfFileWriter
+from reportlab.lib import colors
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.pdfdoc import PDFArray, PDFDictionary, PDFName, PDFString
+from reportlab.pdfbase.acroform import bsPDF
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+from snipeit_metrics import metrics
+from io import BytesIO
+import html
+import copy
+
+# Printed on every document, set from config.ini by configure
+issuer = ''
+issuer_bc = ''
+issuer_ins = ''
+issuer_dep = ''
+aup_url = ''
+# Tables with more rows are laid out with fixed sizes, see inventory_table
+large_table_rows = 200
+# How items are checked off:
+#   rows     a status and a condition dropdown per item, named 'Asset Status {tag}'
+#   compact  the same dropdowns named assets.{tag}.status, sharing their option lists, see CompactForm
+#   table    one status dropdown and a notes field below each table instead of per item
+form_mode = 'rows'
+
+STATUS_OPTIONS = ['', 'Present', 'Missing', 'Returned', 'Other']
+CONDITION_OPTIONS = ['New', 'Good', 'Fair', 'Poor', 'Other']
+TABLE_STATUS_OPTIONS = ['All Present', 'Some Missing', 'Some Returned', 'Other']
+
+# Column widths of large tables, filling the 552pt frame, choice field columns fit 80pt and padding
+ASSET_COLUMNS = [92, 72, 108, 104, 84, 92]
+ACCESSORY_COLUMNS = [96, 264, 96, 96]
+# The same without the status and condition columns, in the table form mode
+TABLE_ASSET_COLUMNS = [96, 168, 168, 120]
+TABLE_ACCESSORY_COLUMNS = [456, 96]
+# Row height of large tables, fits the 14pt choice fields and the cell padding
+ROW_HEIGHT = 20
+
+_template = None
+
+_fonts_registered = False
+
+# Whether the ReportLab internals used by CompactForm and add_signature_field work, see form_internals
+_form_internals = None
+
+
+def register_fonts():
+    """Registers the Myriad Pro fonts, once per process."""
+    global _fonts_registered
+    if _fonts_registered:
+        return
+    pdfmetrics.registerFont(TTFont('MyriadPro-Bold', 'fonts/MYRIADPRO-BOLD.TTF'))
+    pdfmetrics.registerFont(TTFont('MyriadPro-SemiBold', 'fonts/MYRIADPRO-SEMIBOLD.TTF'))
+    pdfmetrics.registerFont(TTFont('MyriadPro-Regular', 'fonts/MYRIADPRO-REGULAR.TTF'))
+    _fonts_registered = True
+
+
+def configure(**settings):
+    """Sets the issuer and aup_url values printed on every document.
+
+    Rendering processes receive the settings with every document, so the
+    shared template is only rebuilt when they actually change.
+
+    Keyword Arguments:
+        settings {string} -- issuer, issuer_bc, issuer_ins, issuer_dep, aup_url, large_table_rows and form_mode
+    """
+    global _template
+    changed = False
+    for name, value in settings.items():
+        if globals()[name] != value:
+            globals()[name] = value
+            changed = True
+    if changed:
+        _template = None
+
+
+class TextField(Flowable):
+    def __init__(self, **options):
+        Flowable.__init__(self)
+        self.options = options
+        # Use Reportlab's default size if not user provided
+        self.width = options.get('width', 180)
+        self.height = options.get('height', 18)
+
+    def draw(self):
+        self.canv.saveState()
+        form = self.canv.acroForm
+        form.textfieldRelative(**self.options)
+        self.canv.restoreState()
+
+        
+class ChoiceField(Flowable):
+    def __init__(self, **options):
+        Flowable.__init__(self)
+        options['relative'] = True
+        self.options = options
+        # Use Reportlab's default size if not user provided
+        self.width = options.get('width', 80)
+        self.height = options.get('height', 18)
+
+    def draw(self):
+        self.canv.saveState()
+        form = self.canv.acroForm
+        form.choice(**self.options)
+        self.canv.restoreState()
+
+
+class CompactForm:
+    """Hierarchical choice fields of one document, such as assets.{tag}.status.
+
+    ReportLab writes every dropdown as a top level field carrying its own
+    type, flags and option list, plus a font object of its own that keeps
+    its appearance stream from being shared. Here each item is a parent
+    field holding its status and condition fields, the type and flags are
+    set once on the assets and accessories fields and inherited, and the
+    font, each option list and each appearance stream are written once.
+    """
+    def __init__(self):
+        self._nodes = {}  # dotted name: parent field dictionary
+        self._options = {}  # options: reference to the shared Opt array
+        self._font = None
+
+    def node(self, form, name):
+        """Returns the parent field called name, adding it and its parents on first use."""
+        node = self._nodes.get(name)
+        if node is None:
+            parent, _, partial = name.rpartition('.')
+            node = PDFDictionary({'T': PDFString(partial), 'Kids': PDFArray([])})
+            if parent:
+                parent_node = self.node(form, parent)
+                node['Parent'] = form.getRef(parent_node)
+                parent_node['Kids'].sequence.append(form.getRef(node))
+            else:
+                node['FT'] = PDFName('Ch')
+                node['Ff'] = 1 << 17  # combo box
+                form.fields.append(form.getRef(node))
+            self._nodes[name] = node
+        return node
+
+    def options(self, form, options):
+        key = tuple(options)
+        ref = self._options.get(key)
+        if ref is None:
+            ref = self._options[key] = form.getRef(PDFArray([PDFString(option) for option in options]))
+        return ref
+
+    def choice(self, canv, name, value, options, width, height):
+        """Adds the dropdown called name at the current position of canv."""
+        form = canv.acroForm
+        parent, _, partial = name.rpartition('.')
+        x, y = canv.absolutePosition(0, 0)
+        default = form.useDefault
+        text_color, border_color, fill_color, border_width = form.getDefaults(default, default, default, default)
+        if self._font is None:
+            self._font = form.makeFont(None)
+        font_ref, font_name = self._font
+        index = options.index(value)
+
+        appearance = form.txAP(
+            'N', value, font_name, f'<</{font_name} {font_ref}>>', 12,
+            fillColor=fill_color, borderColor=border_color, textColor=text_color, borderWidth=border_width,
+            width=width, height=height, wkind='choice', labels=options, I=[index],
+        )
+        appearance_ref = form._refMap.get(appearance._af_refstr)
+        if appearance_ref is None:
+            appearance_ref = form._refMap[appearance._af_refstr] = form.getRef(appearance)
+
+        field = PDFDictionary({
+            'Parent': form.getRef(self.node(form, parent)),
+            'T': PDFString(partial),
+            'V': PDFString(value),
+            'DV': PDFString(value),
+            'I': PDFArray([index]),
+            'Opt': self.options(form, options),
+            'Rect': PDFArray((x, y, x + width, y + height)),
+            'AP': PDFDictionary({'N': appearance_ref}),
+            'P': canv._doc.thisPageRef(),
+            'Type': PDFName('Annot'),
+            'Subtype': PDFName('Widget'),
+            'F': 4,  # print
+            'BS': bsPDF(border_width, 'solid', 3),
+            'MK': PDFDictionary({'BG': PDFArray(form.colorTuple(fill_color)), 'BC': PDFArray(form.colorTuple(border_color))}),
+        })
+        canv._addAnnotation(field)
+        self.node(form, parent)['Kids'].sequence.append(form.getRef(field))
+
+
+class CompactChoiceField(Flowable):
+    def __init__(self, fields, name, value, options, width=80, height=14):
+        Flowable.__init__(self)
+        self.fields = fields
+        self.name = name
+        self.value = value
+        self.options = options
+        self.width = width
+        self.height = height
+
+    def draw(self):
+        self.canv.saveState()
+        self.fields.choice(self.canv, self.name, self.value, self.options, self.width, self.height)
+        self.canv.restoreState()
+
+
+class SignatureField(Flowable):
+    def __init__(self, title='emp_sig', width=216, height=36, background_color=colors.HexColor("#D3D3D3")):
+        super().__init__()
+        self.title = title
+        self.width = width
+        self.height = height
+        self.background_color = background_color
+        self.coordinates = None  # Store the coordinates here
+        self.page_number = None
+        # Set to add the signature field while drawing instead of through modify_pdf
+        self.field_name = None
+        
+    def draw(self):
+        canvas = self.canv
+        x, y = canvas.absolutePosition(0, 0)
+        self.coordinates = (x, y, self.width, self.height)  # Save the coordinates
+        self.page_number = self.canv.getPageNumber()
+        canvas.setFillColor(self.background_color)
+        canvas.rect(0, 0, self.width, self.height, fill=True)
+        if self.field_name:
+            add_signature_field(canvas, self.field_name, self.coordinates)
+
+
+class AuthorizationField(Flowable):
+    def __init__(self, title='auth_sig', width=216, height=36, background_color=colors.HexColor("#D3D3D3")):
+        super().__init__()
+        self.title = title
+        self.width = width
+        self.height = height
+        self.background_color = background_color
+        self.coordinates = None  # Store the coordinates here
+        self.page_number = None
+        # Set to add the signature field while drawing instead of through modify_pdf
+        self.field_name = None
+    
+    def draw(self):
+        canvas = self.canv
+        x, y = canvas.absolutePosition(0, 0)
+        self.coordinates = (x, y, self.width, self.height)  # Save the coordinates
+        self.page_number = self.canv.getPageNumber()
+        canvas.setFillColor(self.background_color)
+        canvas.rect(0, 0, self.width, self.height, fill=True)
+        if self.field_name:
+            add_signature_field(canvas, self.field_name, self.coordinates)
+
+
+def add_signature_field(canvas, name, coordinates):
+    """Adds an empty signature field over the box at coordinates of the current page.
+
+    Used for combined documents, where adding the fields of every user
+    through pyhanko afterwards would read the whole form again for each.
+
+    Arguments:
+        canvas {Canvas} -- canvas being drawn
+        name {string} -- name of the field
+        coordinates {tuple} -- x, y, width and height of the box on the page
+    """
+    form = canvas.acroForm
+    x, y, width, height = coordinates
+    field = PDFDictionary({
+        'FT': PDFName('Sig'),
+        'T': PDFString(name),
+        'Rect': PDFArray((x, y, x + width, y + height)),
+        'P': canvas._doc.thisPageRef(),
+        'Type': PDFName('Annot'),
+        'Subtype': PDFName('Widget'),
+        'F': 4,  # print
+    })
+    canvas._addAnnotation(field)
+    form.fields.append(form.getRef(field))
+
+
+class UserBookmark(Flowable):
+    """Zero sized flowable adding an outline entry for the page a user's document starts on."""
+    def __init__(self, key, title):
+        Flowable.__init__(self)
+        self.key = key
+        self.title = title
+        self.width = self.height = 0
+
+    def draw(self):
+        self.canv.bookmarkPage(self.key)
+        self.canv.addOutlineEntry(self.title, self.key, level=0)
+
+
+def form_internals():
+    """Returns True when the private ReportLab parts CompactForm and add_signature_field use work.
+
+    They write form fields straight into the document, which no public
+    ReportLab API allows, so they are tried once per process on a scratch
+    canvas. When the installed ReportLab changed them, the compact form
+    mode falls back to rows and combined documents get their signature
+    fields through pyhanko.
+    """
+    global _form_internals
+    if _form_internals is None:
+        try:
+            canvas = Canvas(BytesIO())
+            CompactForm().choice(canvas, 'probe.item.status', 'Present', STATUS_OPTIONS, 80, 14)
+            add_signature_field(canvas, 'probe', (0, 0, 80, 14))
+            canvas.showPage()
+            canvas.save()
+            _form_internals = True
+        except Exception as e:
+            print(f"The installed ReportLab cannot write form fields directly ({type(e).__name__}: {e}), compact forms use rows instead")
+            _form_internals = False
+    return _form_internals
+
+
+def modify_pdf(pdf_buffer, emp_sig, auth_sig, prefix=''):
+    """Appends the Sig1 and Auth1 signature fields to the in-memory PDF.
+
+    Arguments:
+        pdf_buffer {BytesIO} -- PDF written by doc.build, updated in place
+        emp_sig {SignatureField} -- employee signature box drawn during the build
+        auth_sig {AuthorizationField} -- approver signature box drawn during the build
+
+    Keyword Arguments:
+        prefix {string} -- put before the field names, such as the user ID in a combined document (default: {''})
+
+    Errors are raised rather than printed, so a document that could not be
+    made signable is reported as failed instead of written unsigned.
+    """
+    w = IncrementalPdfFileWriter(pdf_buffer)
+
+    # Define the position of the signature field
+    sig_field_page = emp_sig.page_number - 1
+    emp_sig_coordinates = emp_sig.coordinates
+    box_coordinates = (
+        emp_sig_coordinates[0],
+        emp_sig_coordinates[1],
+        emp_sig_coordinates[0] + emp_sig_coordinates[2],
+        emp_sig_coordinates[1] + emp_sig_coordinates[3]
+    )
+
+    # Create the signature field specification
+    sig_field_spec = SigFieldSpec(
+        sig_field_name=f"{prefix}Sig1",
+        on_page=sig_field_page,
+        box=box_coordinates
+    )
+
+    # Append the signature field
+    append_signature_field(w, sig_field_spec)
+    
+    # Define the position of the signature field
+    auth_field_page = auth_sig.page_number - 1 
+    auth_sig_coordinates = auth_sig.coordinates
+    box_coordinates2 = (
+        auth_sig_coordinates[0],
+        auth_sig_coordinates[1],
+        auth_sig_coordinates[0] + auth_sig_coordinates[2],
+        auth_sig_coordinates[1] + auth_sig_coordinates[3]
+    )
+
+    # Create the signature field specification
+    auth_field_spec = SigFieldSpec(
+        sig_field_name=f"{prefix}Auth1",
+        on_page=auth_field_page,
+        box=box_coordinates2
+    )
+
+    # Append the signature field
+    append_signature_field(w, auth_field_spec)
+
+    w.write_in_place()
+    print("Signature fields added successfully.")
+
+
+class InventoryTemplate:
+    """Styles, table styles and static text shared by every document of a run.
+
+    Built once per process by get_template, so rendering a user only creates
+    the flowables that hold user specific values.
+    """
+    def __init__(self):
+        register_fonts()
+
+        # Define styles
+        styles = getSampleStyleSheet()
+        self.header_style = styles['Heading1'].clone('InventoryHeading', fontName='MyriadPro-Bold')
+        self.paragraph_style = styles['BodyText'].clone('InventoryBody', fontName='MyriadPro-Regular')
+        self.url_style = self.paragraph_style.clone('URLStyle', textColor='blue', underline=True)
+        # Item text too long for its column in a large table, wrapped inside the cell
+        self.cell_style = self.paragraph_style.clone('InventoryCell', spaceBefore=0, spaceAfter=0)
+        self.table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), '#041E42'),
+            ('TEXTCOLOR', (0, 0), (-1, 0), '#FFFFFF'),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'MyriadPro-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), '#EEEEEE'),
+            ('FONTNAME', (0, 1), (-1, -1), 'MyriadPro-Regular'),
+            ('BOX', (0, 0), (-1, -1), 1, colors.black),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ])
+        self.header_table = TableStyle([
+            ('LEADING', (0, 2), (0, 6), 6),
+            ('LEADING', (0, 7), (-1, -1), 12),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'MyriadPro-Regular'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('FONTSIZE', (0, 3), (0, 3), 6),
+            ('FONTSIZE', (0, 5), (0, 5), 6),
+            ('FONTSIZE', (0, 7), (0, 7), 6),
+            ('FONTNAME', (0, 8), (0, 8), 'MyriadPro-Bold'),
+            ('WORDWRAP', (0, 10), (0, 10), True),
+        ])
+        self.contact_table = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'MyriadPro-Regular'),
+            ('WIDTH', (0, 0), (-1, -1), 'auto'),
+        ])
+
+        self.contact_table2 = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'MyriadPro-Regular'),
+            ('WIDTH', (0, 0), (-1, -1), 'auto'),
+        ])
+
+        self.agree_table = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'MyriadPro-Bold'),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('SPAN', (2, 0), (4, 0)),
+            ('BOX', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTNAME', (0, 0), (-1, 0), 'MyriadPro-Regular'),
+            ('WIDTH', (0, 0), (-1, -1), 'auto'),
+        ])
+
+        self.agree_table2 = TableStyle([
+
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'MyriadPro-Bold'),
+            ('WIDTH', (0, 0), (-1, -1), 'auto'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('BOTTOMPADDING', (0, 0), (-1, 1), 7),
+            ('LINEBELOW', (0, 0), (-1, 0), 4, colors.black),  # Add a line below the first row
+            ('TOPPADDING', (0, 1), (-1, 1), 7),  # Add top padding to the second row
+        ])
+
+        # Static text, parsed once and reused by every document
+        self.agreement_text = Paragraph('The undersigned hereby acknowledges receipt of the equipment listed below, to be in good condition, except as otherwise noted. Nevada System of Higher Education (issuer) employee may be held responsible for damage or loss of loaned equipment.')
+        self.assets_heading = Paragraph("Assets:", self.header_style)
+        self.accessories_heading = Paragraph("Accessories:", self.header_style)
+        url_link = f'<a href="{aup_url}"><u>Casat Acceptable Use Policy</u></a>'
+        self.aup_link = Paragraph(url_link, self.url_style)
+
+
+def get_template():
+    """Returns the InventoryTemplate of this process, building it on first use."""
+    global _template
+    if _template is None:
+        _template = InventoryTemplate()
+    return _template
+
+
+def fit(text, width, style, font='MyriadPro-Regular', size=10):
+    """Returns text when it fits width points of a table cell, padding included, else a Paragraph wrapping it."""
+    text = str(text)
+    if pdfmetrics.stringWidth(text, font, size) <= width - 12:
+        return text
+    return Paragraph(html.escape(text, quote=False), style)
+
+
+def inventory_table(data, columns, template):
+    """Returns the asset or accessory table of a document.
+
+    Up to large_table_rows rows, ReportLab measures every cell to size the
+    columns as before. Larger tables, such as those of pool and department
+    users holding thousands of items, get fixed column widths and row
+    heights and are laid out as a LongTable, so layout time grows linearly
+    with the rows. Text too long for its column is wrapped, and only the
+    rows holding such text are measured, so no tag, serial or name is cut.
+
+    Arguments:
+        data {list} -- header row followed by the item rows
+        columns {list} -- column widths used for a large table
+        template {InventoryTemplate} -- styles of the run
+    """
+    if len(data) - 1 <= large_table_rows:
+        table = Table(data, repeatRows=1)
+    else:
+        rows = [data[0]]
+        heights = [ROW_HEIGHT]
+        for row in data[1:]:
+            cells = [fit(cell, width, template.cell_style) if isinstance(cell, (str, int)) else cell for cell, width in zip(row, columns)]
+            rows.append(cells)
+            # None lets ReportLab size the rows holding wrapped text
+            heights.append(None if any(isinstance(cell, Paragraph) for cell in cells) else ROW_HEIGHT)
+        table = LongTable(rows, colWidths=columns, rowHeights=heights, repeatRows=1)
+    table.setStyle(template.table_style)
+    return table
+
+
+def partial_name(key):
+    """Returns key as one part of a hierarchical field name, which cannot hold periods."""
+    return str(key).replace('.', '_')
+
+
+def table_status(group, template, prefix=''):
+    """Returns the status dropdown and notes field checking off a whole table, in the table form mode.
+
+    Arguments:
+        group {string} -- Assets or Accessories, used in the label and the field names
+        template {InventoryTemplate} -- styles of the run
+
+    Keyword Arguments:
+        prefix {string} -- put before the field names (default: {''})
+    """
+    status = ChoiceField(name=f'{prefix}{group} Status', tooltip=f'Status of all {group.lower()}', value='All Present', options=TABLE_STATUS_OPTIONS, width=100, height=14)
+    notes = TextField(name=f'{prefix}{group} Notes', tooltip=f'Missing, returned or damaged {group.lower()}', value='', width=220, height=14)
+    table = Table([[f'Status of all {group.lower()} listed:', status, 'Notes:', notes]])
+    table.setStyle(template.contact_table)
+    return table
+
+
+def new_document(pdf_buffer):
+    """Returns the letter sized document template every PDF is laid out on."""
+    return SimpleDocTemplate(
+        pdf_buffer,
+        pagesize=letter, 
+        topMargin=18,  # Adjust the top margin as needed
+        bottomMargin=18,
+        leftMargin=24,
+        rightMargin=24,
+    )
+
+
+def inventory_story(user_name, user_email, user_id, assets, accessories, template, prefix=''):
+    """Returns the flowables of a user's document and its employee and approver signature boxes.
+
+    Arguments:
+        user_name {string} -- user name as returned by the API, HTML escaped
+        user_email {string} -- email printed on the document
+        user_id {int} -- Snipe-IT user ID
+        assets {list} -- AssetRows, or None when they could not be read
+        accessories {list} -- AccessoryRows, or None when they could not be read
+        template {InventoryTemplate} -- styles of the run
+
+    Keyword Arguments:
+        prefix {string} -- put before every field name, to keep the fields of users apart in a combined document (default: {''})
+    """
+    mode = 'rows' if form_mode == 'compact' and not form_internals() else form_mode
+    fields = CompactForm() if mode == 'compact' else None
+
+    # Create asset table data
+    asset_data = [['Asset Status', 'Asset Tag', 'Asset Name', 'Asset Model', 'Serial #', 'Asset Condition']]
+    if assets is None:
+        asset_data.append(['', 'Error in data set', '', '', '', ''])
+    elif not assets:
+        asset_data.append(['', 'No Assets Assigned', '', '', '', ''])
+    else:
+        for asset_tag, asset_name, asset_model, asset_serial in assets:
+            if mode == 'compact':
+                asset_status = CompactChoiceField(fields, f'{prefix}assets.{partial_name(asset_tag)}.status', 'Present', STATUS_OPTIONS)
+                asset_condition = CompactChoiceField(fields, f'{prefix}assets.{partial_name(asset_tag)}.condition', 'Good', CONDITION_OPTIONS)
+            elif mode == 'table':
+                asset_status = asset_condition = ''
+            else:
+                asset_status = ChoiceField(name=f'{prefix}Asset Status {asset_tag}', tooltip='Status', value='Present', options=STATUS_OPTIONS, width=80, height=14)
+                asset_condition = ChoiceField(name=f'{prefix}Asset Condition {asset_tag}', tooltip='Condition', value='Good', options=CONDITION_OPTIONS, width=80, height=14)
+            asset_data.append([asset_status, asset_tag, asset_name, asset_model, asset_serial, asset_condition])
+
+    # Create accessory table data
+    accessory_data = [['Accessory Status', 'Accessory Name', 'Accessory ID', 'Accessory Condition']]
+    if accessories is None:
+        accessory_data.append(['', 'Error in data set', '', ''])
+    elif not accessories:
+        accessory_data.append(['', 'No Accessories Assigned to user', '', ''])
+    else:
+        accessory_count = {}
+        for accessory_id, accessory_name in accessories:
+
+            # Check if the accessory_id is already in the accessory_count dictionary
+            if accessory_id in accessory_count:
+                # Increment the count for the accessory_id
+                accessory_count[accessory_id] += 1
+                # Append the tick-up number to the accessory_id
+                choice_field_name = f'Accessory Status {accessory_id}_{accessory_count[accessory_id]}'
+                accessory_condition_field = f'Accessory Condition {accessory_id}_{accessory_count[accessory_id]}'
+            else:
+                # First occurrence of the accessory_id, no tick-up number needed
+                accessory_count[accessory_id] = 1
+                choice_field_name = f'Accessory Status {accessory_id}'
+                accessory_condition_field = f'Accessory Condition {accessory_id}'
+
+            if mode == 'compact':
+                item = accessory_id if accessory_count[accessory_id] == 1 else f'{accessory_id}_{accessory_count[accessory_id]}'
+                accessory_status = CompactChoiceField(fields, f'{prefix}accessories.{item}.status', 'Present', STATUS_OPTIONS)
+                accessory_condition = CompactChoiceField(fields, f'{prefix}accessories.{item}.condition', 'Good', CONDITION_OPTIONS)
+            elif mode == 'table':
+                accessory_status = accessory_condition = ''
+            else:
+                accessory_status = ChoiceField(name=prefix + choice_field_name, tooltip='Status', value='Present', options=STATUS_OPTIONS, width=80, height=14)
+                accessory_condition = ChoiceField(name=prefix + accessory_condition_field, tooltip='Accessory Condition', value='Good', options=CONDITION_OPTIONS, width=80, height=14)
+            accessory_data.append([accessory_status, accessory_name, accessory_id, accessory_condition])
+
+    if mode == 'table':
+        # Drop the status and condition columns, checked off once per table instead
+        asset_data = [row[1:-1] for row in asset_data]
+        accessory_data = [row[1:-1] for row in accessory_data]
+        asset_table = inventory_table(asset_data, TABLE_ASSET_COLUMNS, template)
+        accessory_table = inventory_table(accessory_data, TABLE_ACCESSORY_COLUMNS, template)
+    else:
+        asset_table = inventory_table(asset_data, ASSET_COLUMNS, template)
+        accessory_table = inventory_table(accessory_data, ACCESSORY_COLUMNS, template)
+    
+    #Header Table
+    header_data = [
+        [issuer],
+        [issuer_bc],
+        [TextField(name=f'{prefix}Name of lending issuer Instutution', tooltip='Enter the Name of lending issuer instutution', value=issuer_ins, width=200, height=16)],
+        ['Name of lending issuer Instutution'],
+        [TextField(name=f'{prefix}Name of lending issuer Department', tooltip='Enter the Name of lending issuer department', value=issuer_dep, width=90, height=16)],
+        ['Name of issuer Lending Department'],
+        [TextField(name=f'{prefix}Name of lending issuer Employee', tooltip='Enter the Name of lending issuer Employee', value=html.unescape(user_name), width=200, height=16)],
+        ['Name of issuer Employee'],
+        ['Equipment Loan Agreement'],
+    ]
+    header = Table(header_data)
+    header.setStyle(template.header_table)
+         
+    #Agreement table
+        # Add URL link
+
+    contact_data= [
+        ['issuer Employee Name:', TextField(name=f'{prefix}employee_name', tooltip='Enter the Name of lending issuer Employee', value=html.unescape(user_name), width=200, height=16), '', 'Telephone:', TextField(name=f'{prefix}Telephone', tooltip='Name of issuer Employee Telephone', value='775-784-6265', width=90, height=18), ''],
+    ]
+    contact_data2= [
+        ['Employee Campus Address:', ChoiceField(name=f'{prefix}address', tooltip='Primary Equipment Address', value='NJC 109', options=['NJC 109', 'WRB 1001', 'EJC 239', 'Off Site', 'Hybrid'], width=80, height=18), '', f"{issuer_dep} Email:", TextField(name=f'{prefix}Email', tooltip='Name of issuer Employee email', value=user_email, width=200, height=18)],
+    ]   
+    contact = Table(contact_data)
+    contact.setStyle(template.contact_table)
+    contact2 = Table(contact_data2)
+    contact2.setStyle(template.contact_table2)
+   
+    agree_deny = ChoiceField(name=f'{prefix}CASAT_AUP', tooltip='AUP Select', value='Accept', options=['Accept', 'Deny'], width=60, height=14)
+
+    signature = []
+    authorization = []
+    emp_sig = SignatureField()
+    signature.append(emp_sig)
+    auth_sig = AuthorizationField()
+    authorization.append(auth_sig)
+    agree_data = [
+        ['Please read and accept the CASAT Acceptable Use Policy:', agree_deny, template.aup_link, '', ''],
+    ]
+    agree_data2 = [
+        ['Digital Signature:', emp_sig, '', ''],
+        ['Approved by:', auth_sig, '', ''],
+    ]
+    agree = Table(agree_data)
+    agree.setStyle(template.agree_table)
+    agree2 = Table(agree_data2)
+    agree2.setStyle(template.agree_table2)
+    
+
+
+    # Create the story
+    story = []
+    
+    story.append(header)
+    # ReportLab marks a flowable it pushed to the next page and never clears the mark, so
+    # each document gets its own copy of the shared paragraphs
+    story.append(copy.copy(template.agreement_text))
+    story.append(copy.copy(template.assets_heading))
+    story.append(asset_table)
+    if mode == 'table':
+        story.append(table_status('Assets', template, prefix))
+    story.append(copy.copy(template.accessories_heading))
+    story.append(accessory_table)
+    if mode == 'table':
+        story.append(table_status('Accessories', template, prefix))
+    story.append(contact)
+    story.append(contact2)
+    story.append(agree)
+    story.append(agree2)
+    story.append(Paragraph(f"Asset User ID: {user_id}", template.paragraph_style))
+
+            
+
+
+    return story, emp_sig, auth_sig
+
+
+def render_pdf(user_name, user_email, user_id, assets, accessories, template=None):
+    """Lays out and signs a user's document in memory and returns the PDF as bytes."""
+    if template is None:
+        template = get_template()
+    story, emp_sig, auth_sig = inventory_story(user_name, user_email, user_id, assets, accessories, template)
+
+    pdf_buffer = BytesIO()
+    # Build the PDF, this also records the signature field coordinates
+    with metrics.timer('layout'):
+        new_document(pdf_buffer).build(story)
+
+    with metrics.timer('signature'):
+        modify_pdf(pdf_buffer, emp_sig, auth_sig)
+
+    metrics.count('pdf_bytes_total', pdf_buffer.getbuffer().nbytes)
+    return pdf_buffer.getvalue()
+
+
+def render_volume(documents, template=None):
+    """Lays out the documents of several users as one PDF and returns it as bytes.
+
+    Every user starts on a new page and gets an outline entry. The fonts
+    and the form's resources are embedded once for the whole volume, and
+    the fields of each user, signature fields Sig1 and Auth1 included, are
+    named after their user ID, e.g. 1042_Sig1.
+
+    Arguments:
+        documents {iterable} -- user name, email, ID, AssetRows and AccessoryRows of each user
+
+    Keyword Arguments:
+        template {InventoryTemplate} -- styles of the run (default: {None})
+    """
+    if template is None:
+        template = get_template()
+    story = []
+    signatures = []
+    for user_name, user_email, user_id, assets, accessories in documents:
+        user_story, emp_sig, auth_sig = inventory_story(user_name, user_email, user_id, assets, accessories, template, f'{user_id}_')
+        if form_internals():
+            emp_sig.field_name = f'{user_id}_Sig1'
+            auth_sig.field_name = f'{user_id}_Auth1'
+        else:
+            signatures.append((emp_sig, auth_sig, f'{user_id}_'))
+        if story:
+            story.append(PageBreak())
+        story.append(UserBookmark(f'user{user_id}', f'{html.unescape(user_name)} ({user_id})'))
+        story += user_story
+
+    pdf_buffer = BytesIO()
+    with metrics.timer('layout'):
+        new_document(pdf_buffer).build(story)
+    with metrics.timer('signature'):
+        for emp_sig, auth_sig, prefix in signatures:
+            modify_pdf(pdf_buffer, emp_sig, auth_sig, prefix)
+    metrics.count('pdf_bytes_total', pdf_buffer.getbuffer().nbytes)
+    return pdf_buffer.getvalue()
+
+
+def generate_pdf(user_name, user_email, user_id, assets, accessories, template=None, filename=None):
+    """Renders a user's document and writes it to filename, by default {user name}_inventory.pdf."""
+    data = render_pdf(user_name, user_email, user_id, assets, accessories, template)
+    if filename is None:
+        filename = f"{html.unescape(user_name)}_inventory.pdf"
+    with metrics.timer('write'), open(filename, 'wb') as pdf_file:
+        pdf_file.write(data)
+    print(f"PDF {filename} created successfully")
@@ -0,0 +1,737 @@
+from collections import namedtuple
+from urllib.parse import urlparse
+from bisect import bisect_left
+import difflib
+from snipeit_metrics import metrics
+import threading
+import json
+import html
+import time
+import csv
+
+# Simultaneous requests allowed against one API host, see configure()
+max_host_requests = 4
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+# Number of rows requested per page of paginated endpoints such as /users
+user_page_size = 500
+
+# Optional snipeit_cache.ResponseCache consulted by api_get, see configure()
+cache = None
+
+# Retries of 429, 5xx and failed connections, and the first backoff in seconds
+request_retries = 3
+retry_backoff = 1.0
+
+# Seconds to connect and to wait for each read of a response, a stalled request fails instead of blocking
+request_timeout = (10.0, 60.0)
+
+# Shared keep-alive session and the rate limiter every request goes through
+_session = None
+_session_lock = threading.Lock()
+_limiter = None
+
+# ijson module once looked up by streaming_parser, None when it is not installed
+_ijson = False
+
+# Fields of paginated rows used by the tools, everything else is dropped while parsing
+ROW_FIELDS = {
+    'id': None, 'name': None, 'email': None, 'department': {'name': None}, 'asset_tag': None, 'serial': None,
+    'model': {'name': None}, 'assigned_pivot_id': None, 'assigned_to': {'id': None, 'type': None},
+    'action_type': None, 'target': {'id': None, 'type': None},
+}
+
+# Lightweight records built straight from the api JSON
+UserRow = namedtuple('UserRow', ['id', 'name', 'email', 'department'], defaults=[None])
+AssetRow = namedtuple('AssetRow', ['asset_tag', 'name', 'model', 'serial'])
+AccessoryRow = namedtuple('AccessoryRow', ['id', 'name'])
+
+
+class ApiError(Exception):
+    """A page of a paginated endpoint that came back as an error instead of rows."""
+
+
+class TokenBucket:
+    """Spaces requests out to stay within the Snipe-IT API throttle.
+
+    The bucket holds up to burst tokens and refills at rate tokens per
+    second. Every request takes one, waiting when the bucket is empty, and a
+    429 answer pauses every caller for the time the server asked for.
+    """
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Waits for and takes one token."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Holds every caller back for seconds and empties the bucket."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+def configure(host_requests=None, page_size=None, response_cache=None, requests_per_minute=None, burst=None, retries=None, timeout=None):
+    """Sets the shared request limits and response cache, usually from config.ini.
+
+    Keyword Arguments:
+        host_requests {int} -- simultaneous requests per API host (default: {None})
+        page_size {int} -- rows requested per page (default: {None})
+        response_cache {ResponseCache} -- cache used by api_get (default: {None})
+        requests_per_minute {int} -- rate limit of the API, 0 for none (default: {None})
+        burst {int} -- requests allowed at once before the rate limit applies (default: {None})
+        retries {int} -- retries of throttled or failed requests (default: {None})
+        timeout {tuple} -- connect and read timeouts in seconds (default: {None})
+    """
+    global max_host_requests, user_page_size, cache, request_retries, request_timeout, _limiter, _session
+    if response_cache is not None:
+        cache = response_cache
+    if host_requests is not None:
+        max_host_requests = host_requests
+        with _host_limits_lock:
+            _host_limits.clear()
+        # The connection pool is sized from max_host_requests
+        with _session_lock:
+            _session = None
+    if page_size is not None:
+        user_page_size = page_size
+    if requests_per_minute is not None:
+        _limiter = TokenBucket(requests_per_minute / 60, burst or 10) if requests_per_minute > 0 else None
+    if retries is not None:
+        request_retries = retries
+    if timeout is not None:
+        request_timeout = timeout
+
+
+def configure_from(config):
+    """Applies the request settings of the DEFAULT section of config.ini.
+
+    Arguments:
+        config {ConfigParser} -- loaded config.ini
+    """
+    configure(
+        host_requests=config.getint('DEFAULT', 'max_host_requests', fallback=4),
+        page_size=config.getint('DEFAULT', 'user_page_size', fallback=500),
+        requests_per_minute=config.getint('DEFAULT', 'requests_per_minute', fallback=120),
+        burst=config.getint('DEFAULT', 'request_burst', fallback=10),
+        retries=config.getint('DEFAULT', 'request_retries', fallback=3),
+        timeout=(
+            config.getfloat('DEFAULT', 'connect_timeout', fallback=10.0),
+            config.getfloat('DEFAULT', 'read_timeout', fallback=60.0),
+        ),
+    )
+
+
+def get_session():
+    """Returns the shared keep-alive session, creating it on first use.
+
+    requests is imported here rather than at the top of the module, so the
+    tools start without it until the first API call.
+    """
+    global _session
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(max_host_requests, 1))
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+            _session.headers.update({'Accept': 'application/json', 'Accept-Encoding': 'gzip, deflate'})
+        return _session
+
+
+def getjson(resp_data):
+    """Converts response data from binary to string or JSON format.
+
+    Arguments:
+        resp_data {string or Response} -- response data returned by requests api
+    """
+    import requests
+
+    with metrics.timer('parse'):
+        if isinstance(resp_data, str):
+            # input is already a string, no need to decode
+            parsed = json.loads(resp_data)
+        elif isinstance(resp_data, requests.Response):
+            # input is a requests Response object, decode content and parse JSON
+            parsed = json.loads(resp_data.content)
+        else:
+            raise ValueError("Invalid input type, must be string or Response")
+
+    return parsed
+
+
+def user_row(user):
+    """Builds a UserRow from a user returned by the api, department is the name of the user's department or None."""
+    department = user.get('department') or {}
+    return UserRow(user['id'], user['name'], user['email'], department.get('name'))
+
+
+def asset_row(asset):
+    """Builds an AssetRow from an asset returned by the api, decoding HTML entities."""
+    return AssetRow(asset['asset_tag'], html.unescape(asset['name']), html.unescape(asset['model']['name']), asset['serial'])
+
+
+def accessory_row(accessory):
+    """Builds an AccessoryRow from an accessory returned by the api, decoding HTML entities."""
+    return AccessoryRow(accessory['id'], html.unescape(accessory['name']))
+
+
+def format_rows(rows, columns):
+    """Formats rows as a plain text table for printing.
+
+    Arguments:
+        rows {list} -- rows, each a sequence of values
+        columns {list} -- column headings
+    """
+    table = [[str(column) for column in columns]] + [[str(value) for value in row] for row in rows]
+    widths = [max(len(line[i]) for line in table) for i in range(len(columns))]
+    return "\n".join("  ".join(value.ljust(width) for value, width in zip(line, widths)).rstrip() for line in table)
+
+
+def host_limit(url):
+    """Returns the semaphore bounding the simultaneous requests to the host of url."""
+    host = urlparse(url).netloc
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(max_host_requests)
+        return _host_limits[host]
+
+
+def api_request(method, url, headers, params=None, payload=None, stream=False):
+    """Sends a request through the shared session, rate limiter and per-host slots.
+
+    429 and 5xx responses are retried up to request_retries times, waiting
+    for the Retry-After header when the server sends one and for an
+    exponential backoff otherwise. Requests time out after request_timeout,
+    and GET requests that timed out or lost their connection are retried.
+    Other requests than GET are only retried when the server refused them
+    before doing anything, on a 429 or a 503 with Retry-After: a 502 or 504
+    may come back after a checkout was made, and a failed connection or a
+    timeout may have sent it, so a checkout is never sent twice. The last
+    response is returned whatever its status.
+
+    Arguments:
+        method {string} -- HTTP method
+        url {string} -- full url of the api call
+        headers {dict} -- request headers including the bearer token
+
+    Keyword Arguments:
+        params {dict} -- query string parameters (default: {None})
+        payload {dict} -- JSON body of the request (default: {None})
+        stream {bool} -- leave the body unread for streaming_rows (default: {False})
+    """
+    import requests
+
+    session = get_session()
+    for attempt in range(request_retries + 1):
+        if attempt:
+            metrics.count('http_retries_total')
+        if _limiter is not None:
+            with metrics.timer('rate_wait'):
+                _limiter.acquire()
+        try:
+            with host_limit(url), metrics.timer('request'):
+                resp = session.request(
+                    method, url, headers=headers, params=params, json=payload, stream=stream, timeout=request_timeout,
+                )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            metrics.count('http_timeouts_total' if isinstance(e, requests.Timeout) else 'http_connection_errors_total')
+            if method != 'GET' or attempt == request_retries:
+                raise
+            time.sleep(retry_backoff * 2 ** attempt)
+            continue
+        metrics.count('http_requests_total')
+        if not stream:
+            metrics.count('http_bytes_total', len(resp.content))
+        elif resp.headers.get('Content-Length', '').isdigit():
+            metrics.count('http_bytes_total', int(resp.headers['Content-Length']))
+
+        retry_after = resp.headers.get('Retry-After', '')
+        if method == 'GET':
+            retry = resp.status_code == 429 or resp.status_code >= 500
+        else:
+            retry = resp.status_code == 429 or (resp.status_code == 503 and retry_after != '')
+        if not retry or attempt == request_retries:
+            return resp
+        # The body of a retried response is not needed, free its connection
+        resp.close()
+        delay = float(retry_after) if retry_after.isdigit() else retry_backoff * 2 ** attempt
+        if resp.status_code == 429 and _limiter is not None:
+            _limiter.pause(delay)
+        else:
+            time.sleep(delay)
+
+
+def api_get(url, headers, params=None, stream=False, use_cache=True):
+    """Performs a GET request through api_request.
+
+    When a response cache is configured a fresh cached body is returned as a
+    string without any request, and an expired one is revalidated with a
+    conditional request. Both kinds of result can be passed to getjson.
+    Reads deciding which checkins and checkouts to send pass use_cache=False,
+    since changes made in the web interface do not clear the cache.
+
+    A streamed response is returned unread and not stored, iter_rows stores
+    the rows it kept once the page is parsed, see store_page.
+
+    Arguments:
+        url {string} -- full url of the api call
+        headers {dict} -- request headers including the bearer token
+
+    Keyword Arguments:
+        params {dict} -- query string parameters (default: {None})
+        stream {bool} -- leave the body of a response not served from the cache unread (default: {False})
+        use_cache {bool} -- read from and store in the response cache (default: {True})
+    """
+    cached = use_cache and cache is not None and cache.ttl(url) > 0
+    entry = cache.lookup(url, params) if cached else None
+    if entry is not None:
+        if entry.fresh:
+            metrics.count('cache_hits_total')
+            return entry.body
+        headers = dict(headers)
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+
+    resp = api_request('GET', url, headers, params=params, stream=stream)
+
+    if cached:
+        if resp.status_code == 304 and entry is not None:
+            resp.close()
+            cache.revalidated(url, params)
+            return entry.body
+        # Snipe-IT reports some errors with a 200 status, those are not cached
+        if not stream and resp.ok and not resp.text.startswith('{"status":"error"'):
+            cache.store(url, params, resp.text, resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
+    return resp
+
+
+def api_post(url, headers, payload=None):
+    """Performs a POST request through api_request.
+
+    Arguments:
+        url {string} -- full url of the api call
+        headers {dict} -- request headers including the bearer token
+
+    Keyword Arguments:
+        payload {dict} -- JSON body of the request (default: {None})
+    """
+    return api_request('POST', url, headers, payload=payload)
+
+
+def invalidate(user_ids=(), accessory_ids=()):
+    """Drops cached responses that a checkin or checkout made stale.
+
+    Keyword Arguments:
+        user_ids {iterable} -- users whose assets or accessories changed (default: {()})
+        accessory_ids {iterable} -- accessories whose holders changed (default: {()})
+    """
+    if cache is None:
+        return
+    for user_id in user_ids:
+        cache.invalidate_user(user_id)
+    for accessory_id in accessory_ids:
+        cache.invalidate_accessory(accessory_id)
+
+
+def streaming_parser():
+    """Returns the ijson module, or None when it is not installed."""
+    global _ijson
+    if _ijson is False:
+        try:
+            import ijson
+        except ImportError:
+            ijson = None
+        _ijson = ijson
+    return _ijson
+
+
+def slim(value, fields=ROW_FIELDS):
+    """Returns the parts of a row named in fields, dropping the rest.
+
+    Arguments:
+        value {dict} -- row parsed from the api
+        fields {dict} -- field names mapped to None, or to the fields kept of a nested object
+    """
+    if not isinstance(value, dict):
+        return value
+    return {name: slim(value[name], nested) if nested else value[name] for name, nested in fields.items() if name in value}
+
+
+def streaming_rows(resp, page):
+    """Yields the rows of a streamed response one at a time, dropping unused fields as they are parsed.
+
+    Only the row being parsed is held in memory, however large the
+    response. The total of the page is stored in page['total'] once read.
+
+    Arguments:
+        resp {Response} -- response requested with stream=True
+        page {dict} -- receives the total of the page
+    """
+    ijson = streaming_parser()
+    resp.raw.decode_content = True
+    builder = None
+    has_rows = False
+    try:
+        for prefix, event, value in ijson.parse(resp.raw, use_float=True):
+            if prefix == 'rows' and event == 'start_array':
+                has_rows = True
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == 'rows.item' and event in ('end_map', 'end_array'):
+                    yield slim(builder.value)
+                    builder = None
+            elif prefix == 'rows.item' and event in ('start_map', 'start_array'):
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+            elif prefix == 'total' and event == 'number':
+                page['total'] = value
+    finally:
+        resp.close()
+    if not has_rows:
+        raise ApiError(f"{resp.url}: the response holds no rows")
+
+
+def page_rows(resp_data, page):
+    """Yields the rows of one page of a paginated endpoint and stores its total in page['total'].
+
+    Streamed responses are decoded incrementally when ijson is installed,
+    cached bodies and unstreamed responses go through getjson. A page that
+    failed, or answered with an error instead of rows, raises ApiError
+    rather than passing for the last page.
+
+    Arguments:
+        resp_data {string or Response} -- result of api_get
+        page {dict} -- receives the total of the page
+    """
+    if not isinstance(resp_data, str):
+        if not resp_data.ok:
+            resp_data.close()
+            raise ApiError(f"{resp_data.url}: HTTP {resp_data.status_code}")
+        if not resp_data._content_consumed and streaming_parser() is not None:
+            metrics.count('pages_streamed_total')
+            yield from streaming_rows(resp_data, page)
+            return
+    jsondata = getjson(resp_data)
+    if not isinstance(jsondata, dict) or 'rows' not in jsondata:
+        # Snipe-IT reports some errors with a 200 status and a message instead of rows
+        message = jsondata.get('messages') or jsondata.get('status') if isinstance(jsondata, dict) else None
+        source = 'cached response' if isinstance(resp_data, str) else resp_data.url
+        raise ApiError(f"{source}: the response holds no rows: {message}")
+    page['total'] = jsondata.get('total', 0)
+    for row in jsondata['rows']:
+        yield slim(row)
+
+
+def store_page(url, params, resp, page, rows):
+    """Caches a page read by iter_rows as its total and its rows, already slimmed.
+
+    The rows are those kept while the page streamed, so the cached body is
+    smaller than the response and reads back through page_rows as before.
+
+    Arguments:
+        url {string} -- full url of the api call
+        params {dict} -- query string parameters of the page
+        resp {Response} -- response the rows were read from
+        page {dict} -- total of the page, filled in by page_rows
+        rows {list} -- slimmed rows of the page
+    """
+    body = json.dumps({'total': page['total'], 'rows': rows}, separators=(',', ':'))
+    cache.store(url, params, body, resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
+
+
+def iter_rows(url, headers, params=None, use_cache=True):
+    """Yields the rows of a paginated endpoint as each page arrives.
+
+    Rows only keep the fields in ROW_FIELDS. With ijson installed, pages
+    that are not served from the cache are parsed while they download, so
+    memory stays flat whatever the page size. Pages of cached endpoints
+    keep their slimmed rows until the page ends, to store them. A page
+    that cannot be read raises ApiError, so callers never mistake a partial
+    read for the whole list.
+
+    Arguments:
+        url {string} -- full url of the api call
+        headers {dict} -- request headers including the bearer token
+
+    Keyword Arguments:
+        params {dict} -- extra query string parameters (default: {None})
+        use_cache {bool} -- read the pages through the response cache (default: {True})
+    """
+    offset = 0
+    while True:
+        page_params = dict(params or {}, limit=user_page_size, offset=offset)
+        page = {'total': 0}
+        count = 0
+        resp = api_get(url, headers, page_params, stream=True, use_cache=use_cache)
+        kept = [] if use_cache and cache is not None and cache.ttl(url) > 0 and not isinstance(resp, str) else None
+        for row in page_rows(resp, page):
+            count += 1
+            if kept is not None:
+                kept.append(row)
+            yield row
+        if kept is not None:
+            store_page(url, page_params, resp, page, kept)
+
+        offset += count
+        if not count or offset >= page['total']:
+            break
+
+
+def iter_users(api_endpoint, headers, search=None):
+    """Yields UserRows from the paginated /users endpoint as each page arrives.
+
+    Arguments:
+        api_endpoint {string} -- base url of the Snipe-IT api
+        headers {dict} -- request headers including the bearer token
+
+    Keyword Arguments:
+        search {string} -- filter applied by the server (default: {None})
+    """
+    params = {'search': search} if search else None
+    for user in iter_rows(api_endpoint + '/users/', headers, params):
+        yield user_row(user)
+
+
+def checkedout_index(api_endpoint, headers, accessory_id, use_cache=True):
+    """Returns the checkout pivot IDs of an accessory grouped by the user holding them.
+
+    The holder list is read once, page by page, so a user holding several
+    units of the accessory gets one pivot ID per unit.
+
+    Arguments:
+        api_endpoint {string} -- base url of the Snipe-IT api
+        headers {dict} -- request headers including the bearer token
+        accessory_id {int} -- accessory whose holders are listed
+
+    Keyword Arguments:
+        use_cache {bool} -- read the holder list through the response cache (default: {True})
+    """
+    holders = {}
+    for holder in iter_rows(api_endpoint + f'/accessories/{accessory_id}/checkedout', headers, use_cache=use_cache):
+        holders.setdefault(holder['id'], []).append(holder['assigned_pivot_id'])
+    return holders
+
+
+class StockIndex:
+    """Assets and accessories of every user, read in bulk and grouped by user ID.
+
+    Built from the /hardware list and the checked out list of each
+    accessory, so the number of requests grows with the inventory pages
+    rather than with the number of users. fetch raises ApiError when any
+    page cannot be read, so an index is always complete and a user missing
+    from it holds nothing.
+    """
+    def __init__(self):
+        self.assets = {}
+        self.accessories = {}
+
+    @classmethod
+    def fetch(cls, api_endpoint, headers):
+        """Reads the whole inventory and returns its StockIndex.
+
+        Arguments:
+            api_endpoint {string} -- base url of the Snipe-IT api
+            headers {dict} -- request headers including the bearer token
+        """
+        index = cls()
+        for asset in iter_rows(api_endpoint + '/hardware', headers, {'status': 'Deployed'}):
+            assigned = asset.get('assigned_to') or {}
+            if assigned.get('type') == 'user':
+                index.assets.setdefault(assigned['id'], []).append(asset_row(asset))
+
+        for accessory in iter_rows(api_endpoint + '/accessories', headers):
+            row = accessory_row(accessory)
+            for holder in iter_rows(api_endpoint + f'/accessories/{row.id}/checkedout', headers):
+                index.accessories.setdefault(holder['id'], []).append(row)
+        return index
+
+    def stock(self, user_id):
+        """Returns the AssetRows and AccessoryRows held by a user."""
+        return self.assets.get(user_id, []), self.accessories.get(user_id, [])
+
+
+def normalize_name(name):
+    """Returns name HTML-unescaped, case-folded and with single spaces, for lookups."""
+    return ' '.join(html.unescape(name or '').split()).casefold()
+
+
+class UserIndex:
+    """Resolves user IDs, emails and names without scanning the directory.
+
+    Build it once, for example from iter_users, and look up as many
+    identifiers as needed. Emails are matched case-insensitively and names
+    after normalize_name.
+    """
+    def __init__(self, users=()):
+        self.by_id = {}
+        self.by_email = {}
+        self.by_name = {}
+        self._keys = None  # Sorted emails and names for prefix lookups, built on demand
+        for user in users:
+            self.add(user)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def add(self, user):
+        """Adds a UserRow to the index."""
+        self.by_id[user.id] = user
+        if user.email:
+            self.by_email.setdefault(user.email.strip().lower(), []).append(user)
+        self.by_name.setdefault(normalize_name(user.name), []).append(user)
+        self._keys = None
+
+    def lookup(self, query):
+        """Returns the users whose ID, email, or name is exactly query.
+
+        Arguments:
+            query {string or int} -- user name, email, or ID
+        """
+        query = str(query).strip()
+        if query.isdigit() and int(query) in self.by_id:
+            return [self.by_id[int(query)]]
+        return list(self.by_email.get(query.lower()) or self.by_name.get(normalize_name(query)) or [])
+
+    def candidates(self, query, limit=5):
+        """Returns users whose email or name starts with query, or failing that the closest names.
+
+        Arguments:
+            query {string} -- partial or misspelled user name or email
+
+        Keyword Arguments:
+            limit {int} -- maximum number of users returned (default: {5})
+        """
+        if self._keys is None:
+            self._keys = sorted(set(self.by_email) | set(self.by_name))
+        key = normalize_name(query)
+
+        keys = []
+        for name in self._keys[bisect_left(self._keys, key):]:
+            if not name.startswith(key) or len(keys) >= limit:
+                break
+            keys.append(name)
+        if not keys:
+            keys = difflib.get_close_matches(key, self._keys, n=limit)
+
+        users = {}
+        for name in keys:
+            for user in self.by_email.get(name, []) + self.by_name.get(name, []):
+                users.setdefault(user.id, user)
+        return list(users.values())[:limit]
+
+
+def find_users(api_endpoint, headers, query, index=None):
+    """Returns the UserRows whose ID, name, or email is exactly query.
+
+    With an index no request is made. Otherwise an ID is read directly from
+    /users/{id} and anything else is searched for on the server so only the
+    matching page is downloaded.
+
+    Arguments:
+        api_endpoint {string} -- base url of the Snipe-IT api
+        headers {dict} -- request headers including the bearer token
+        query {string or int} -- user name, email, or ID
+
+    Keyword Arguments:
+        index {UserIndex} -- index of the whole directory (default: {None})
+    """
+    if index is not None:
+        return index.lookup(query)
+
+    query = str(query).strip()
+    if query.isdigit():
+        user = getjson(api_get(api_endpoint + f'/users/{query}', headers))
+        if 'id' in user:
+            return [user_row(user)]
+        return []
+
+    return UserIndex(iter_users(api_endpoint, headers, search=query)).lookup(query)
+
+
+def suggest_users(api_endpoint, headers, query, index=None, limit=5):
+    """Returns users close to a query that did not match exactly.
+
+    Arguments:
+        api_endpoint {string} -- base url of the Snipe-IT api
+        headers {dict} -- request headers including the bearer token
+        query {string} -- user name, email, or ID that was not found
+
+    Keyword Arguments:
+        index {UserIndex} -- index of the whole directory (default: {None})
+        limit {int} -- maximum number of users returned (default: {5})
+    """
+    if index is None:
+        index = UserIndex(iter_users(api_endpoint, headers, search=str(query).strip()))
+    return index.candidates(query, limit)
+
+
+def resolve_users(api_endpoint, headers, query, index=None):
+    """Returns the users matching query exactly, printing suggestions when there are none.
+
+    Arguments:
+        api_endpoint {string} -- base url of the Snipe-IT api
+        headers {dict} -- request headers including the bearer token
+        query {string or int} -- user name, email, or ID
+
+    Keyword Arguments:
+        index {UserIndex} -- index of the whole directory (default: {None})
+    """
+    users = find_users(api_endpoint, headers, query, index)
+    if not users:
+        print(f"No user found for {query}")
+        candidates = suggest_users(api_endpoint, headers, query, index)
+        if candidates:
+            print("Did you mean:")
+            print(format_rows(candidates, ['id', 'name', 'email']))
+    return users
+
+
+def read_manifest(path, fields):
+    """Reads a CSV or JSON manifest into a list of dicts holding fields.
+
+    A CSV manifest needs a header row naming the fields. A JSON manifest is a
+    list of objects, or of plain strings when there is a single field.
+
+    Arguments:
+        path {string} -- manifest file, JSON when it ends in .json
+        fields {list} -- field names every entry must have
+    """
+    with open(path, newline='', encoding='utf-8-sig') as manifest:
+        if path.lower().endswith('.json'):
+            entries = json.load(manifest)
+        else:
+            entries = list(csv.DictReader(manifest))
+
+    rows = []
+    for number, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            entry = {fields[0]: entry}
+        missing = [field for field in fields if not str(entry.get(field) or '').strip()]
+        if missing:
+            raise ValueError(f"{path}: entry {number} is missing {', '.join(missing)}")
+        rows.append({field: str(entry[field]).strip() for field in fields})
+    return rows
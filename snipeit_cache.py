@@ -0,0 +1,164 @@
+from collections import namedtuple
+from urllib.parse import urlencode
+import threading
+import sqlite3
+import time
+import re
+
+# Seconds a response stays fresh, by endpoint. Endpoints not listed are never cached.
+DEFAULT_TTLS = {
+    'users': 3600,
+    'assets': 900,
+    'accessories': 900,
+    'checkedout': 300,
+}
+
+# Endpoint name for each cacheable path, checked in order
+ENDPOINTS = [
+    ('assets', re.compile(r'/users/\d+/assets/?$')),
+    ('accessories', re.compile(r'/users/\d+/accessories/?$')),
+    ('checkedout', re.compile(r'/accessories/\d+/checkedout/?$')),
+    ('users', re.compile(r'/users(/\d+)?/?$')),
+]
+
+CacheEntry = namedtuple('CacheEntry', ['body', 'etag', 'last_modified', 'fresh'])
+
+
+class ResponseCache:
+    """SQLite backed cache of Snipe-IT GET responses.
+
+    Each endpoint has its own time to live. Expired entries that carry an
+    ETag or Last-Modified header are revalidated with a conditional request
+    instead of being downloaded again, and the least recently used entries
+    are evicted once the cache holds more than max_entries responses.
+    """
+    def __init__(self, path='snipeit_cache.sqlite', ttls=None, max_entries=20000, refresh=False):
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_entries = max_entries
+        self.refresh = refresh  # Treat every entry as expired, but keep revalidating
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            path TEXT,
+            body TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            stored_at REAL,
+            accessed_at REAL
+        )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_path ON responses (path)")
+        self._db.commit()
+
+    @staticmethod
+    def key(url, params=None):
+        """Returns the cache key of a request."""
+        if params:
+            return url + '?' + urlencode(sorted(params.items()))
+        return url
+
+    def ttl(self, url):
+        """Returns the time to live of a url, 0 when it is not cached."""
+        for endpoint, pattern in ENDPOINTS:
+            if pattern.search(url):
+                return self.ttls.get(endpoint, 0)
+        return 0
+
+    def lookup(self, url, params=None):
+        """Returns the CacheEntry of a request or None.
+
+        Arguments:
+            url {string} -- full url of the api call
+
+        Keyword Arguments:
+            params {dict} -- query string parameters (default: {None})
+        """
+        ttl = self.ttl(url)
+        if ttl <= 0:
+            return None
+        key = self.key(url, params)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        body, etag, last_modified, stored_at = row
+        fresh = not self.refresh and now - stored_at < ttl
+        return CacheEntry(body, etag, last_modified, fresh)
+
+    def store(self, url, params, body, etag=None, last_modified=None):
+        """Stores a response body, evicting the least recently used entries when full."""
+        if self.ttl(url) <= 0:
+            return
+        key = self.key(url, params)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, body, etag, last_modified, now, now),
+            )
+            count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._db.commit()
+
+    def revalidated(self, url, params=None):
+        """Marks an entry fresh again after the server answered 304 Not Modified."""
+        with self._lock:
+            self._db.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), self.key(url, params)))
+            self._db.commit()
+
+    def invalidate_user(self, user_id):
+        """Drops the cached assets and accessories of a user."""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM responses WHERE path LIKE ? OR path LIKE ?",
+                (f'%/users/{user_id}/%', f'%/users/{user_id}'),
+            )
+            self._db.commit()
+
+    def invalidate_accessory(self, accessory_id):
+        """Drops the cached checked out list of an accessory."""
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE path LIKE ?", (f'%/accessories/{accessory_id}/checkedout%',))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def from_config(config, no_cache=False, refresh=False):
+    """Builds the ResponseCache described by the Cache section of config.ini.
+
+    Returns None when caching is disabled in config.ini or by --no-cache.
+
+    Arguments:
+        config {ConfigParser} -- loaded config.ini
+
+    Keyword Arguments:
+        no_cache {bool} -- disable the cache for this run (default: {False})
+        refresh {bool} -- revalidate every cached response (default: {False})
+    """
+    if no_cache or not config.getboolean('Cache', 'enabled', fallback=True):
+        return None
+    ttls = {}
+    for endpoint in DEFAULT_TTLS:
+        if config.has_option('Cache', f'ttl_{endpoint}'):
+            ttls[endpoint] = config.getint('Cache', f'ttl_{endpoint}')
+    return ResponseCache(
+        path=config.get('Cache', 'path', fallback='snipeit_cache.sqlite'),
+        ttls=ttls,
+        max_entries=config.getint('Cache', 'max_entries', fallback=20000),
+        refresh=refresh,
+    )
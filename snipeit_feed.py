@@ -0,0 +1,96 @@
+from snipeit_api import iter_rows
+import threading
+import json
+import os
+
+# Activity log actions that change what a user holds
+HOLDING_ACTIONS = ('checkout', 'checkin from')
+
+
+class FeedState:
+    """Position in the Snipe-IT activity log and users waiting for a new document.
+
+    high_water is the ID of the newest activity entry already handled.
+    pending holds users whose stock changed outside the activity log reads,
+    such as the transfers made by transfer.py. The state is a small JSON file
+    that is re-read before every change, so both tools can share it.
+    """
+    def __init__(self, path='feed_state.json'):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        return state.get('high_water'), set(state.get('pending', []))
+
+    def _save(self, high_water, pending):
+        temp = self.path + '.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'high_water': high_water, 'pending': sorted(pending)}, f)
+        os.replace(temp, self.path)
+
+    def touch(self, user_ids):
+        """Marks users as changed so the next delta run renders them.
+
+        Arguments:
+            user_ids {iterable} -- IDs of the users whose stock changed
+        """
+        with self._lock:
+            high_water, pending = self._load()
+            self._save(high_water, pending | set(user_ids))
+
+    def changes(self, api_endpoint, headers):
+        """Returns the users changed since the stored position and the newest activity ID.
+
+        The activity report is read newest first and only up to the stored
+        position. Without a stored position the users are None, since every
+        user has to be rendered once.
+
+        Arguments:
+            api_endpoint {string} -- base url of the Snipe-IT api
+            headers {dict} -- request headers including the bearer token
+        """
+        high_water, pending = self._load()
+        newest = high_water
+        users = set(pending)
+        params = {'sort': 'id', 'order': 'desc'}
+        for entry in iter_rows(api_endpoint + '/reports/activity', headers, params):
+            if newest is None or entry['id'] > newest:
+                newest = entry['id']
+            if high_water is None or entry['id'] <= high_water:
+                break
+            target = entry.get('target') or {}
+            if entry.get('action_type') in HOLDING_ACTIONS and target.get('type') == 'user':
+                users.add(target['id'])
+        if high_water is None:
+            # An empty activity log still gives the next run a position to start from
+            return None, newest or 0
+        return users, newest
+
+    def advance(self, high_water, done=()):
+        """Stores the new position and drops the users whose documents are up to date.
+
+        Arguments:
+            high_water {int} -- newest activity ID handled
+
+        Keyword Arguments:
+            done {iterable} -- IDs of the users rendered successfully (default: {()})
+        """
+        with self._lock:
+            stored, pending = self._load()
+            if stored is not None and (high_water is None or stored > high_water):
+                high_water = stored
+            self._save(high_water, pending - set(done))
+
+
+def from_config(config):
+    """Builds the FeedState named by feed_state in the DEFAULT section of config.ini.
+
+    Arguments:
+        config {ConfigParser} -- loaded config.ini
+    """
+    return FeedState(config.get('DEFAULT', 'feed_state', fallback='feed_state.json'))
@@ -1,463 +1,730 @@
-from reportlab.platypus import SimpleDocTemplate, Flowable, Paragraph, Table, TableStyle
-from pyhanko.sign.fields import SigFieldSpec, append_signature_field
-from pyhanko.pdf_utils.incremental_writer import IncrementalPdfFileWriter
-from reportlab.lib import colors
-from reportlab.pdfbase import pdfmetrics
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfbase.ttfonts import TTFont
-import requests
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait, as_completed
+from collections import deque
+from snipeit_api import getjson, api_get, iter_users, resolve_users, read_manifest, asset_row, accessory_row, format_rows, UserIndex, StockIndex
+import snipeit_api
+import snipeit_cache
+import snipeit_feed
+import snipeit_output
+from snipeit_metrics import metrics, rss_mb
 import configparser
+import argparse
+import hashlib
+import gc
 import json
 import html
+import sys
+import os
+
+# Settings from config.ini, read by load_config when the tool starts
+config = None
+api_endpoint = None
+api_token = None
+issuer = None
+issuer_bc = None
+issuer_ins = None
+issuer_dep = None
+no_email = None
+aup_url = None
+
+# Fetch stage concurrency: worker threads and simultaneous requests per API host
+fetch_workers = 8
+# Render stage: number of worker processes, 0 renders on the main process
+render_processes = 0
+# Resident memory in MB above which fetching pauses until rendering catches up, 0 for none
+memory_ceiling = 0
+# Fingerprints of the documents already rendered, see RenderManifest
+render_manifest = 'render_manifest.json'
+
+# Directory or .zip/.tar/.tar.gz archive the documents are written to, and users per subdirectory
+output_path = '.'
+output_shard_size = 0
+
+# Combine the documents of a run into one PDF (all) or one per department (department), '' for one per user
+combine = ''
+COMBINE_MODES = ('all', 'department')
+
+# Asset or accessory tables with more rows are laid out with fixed sizes, see inventory_pdf
+large_table_rows = 200
+# How items are checked off on the documents, see inventory_pdf.form_mode
+form_mode = 'rows'
+FORM_MODES = ('rows', 'compact', 'table')
+
+# Bump when the layout of the document changes so every PDF is rendered again
+TEMPLATE_VERSION = 1
+
+
+def load_config(path='config.ini'):
+    """Reads config.ini into the module settings and the shared API settings.
+
+    Keyword Arguments:
+        path {string} -- config file to read (default: {'config.ini'})
+    """
+    global config, api_endpoint, api_token, issuer, issuer_bc, issuer_ins, issuer_dep, no_email, aup_url
+    global fetch_workers, render_processes, render_manifest, memory_ceiling, large_table_rows, form_mode
+    global output_path, output_shard_size, combine
+    config = configparser.ConfigParser()
+    config.read(path)
+
+    # Get API endpoint and API token from config.ini these are used to create the pdf
+    api_endpoint = config['DEFAULT']['api_endpoint']
+    api_token = config['DEFAULT']['api_token']
+    issuer = config.get('Location', 'issuer')
+    issuer_bc = config.get('Location', 'issuer_bc')
+    issuer_ins = config.get('Location', 'issuer_ins')
+    issuer_dep = config.get('Location', 'issuer_dep')
+    no_email = config.get('DEFAULT', 'no_email')
+    aup_url = config.get('DEFAULT', 'aup_url')
+
+    fetch_workers = config.getint('DEFAULT', 'fetch_workers', fallback=8)
+    render_processes = config.getint('DEFAULT', 'render_processes', fallback=0)
+    memory_ceiling = config.getint('DEFAULT', 'memory_ceiling_mb', fallback=0)
+    large_table_rows = config.getint('DEFAULT', 'large_table_rows', fallback=200)
+    form_mode = config.get('DEFAULT', 'form_mode', fallback='rows')
+    render_manifest = config.get('DEFAULT', 'render_manifest', fallback='render_manifest.json')
+    output_path = config.get('DEFAULT', 'output', fallback='.')
+    output_shard_size = config.getint('DEFAULT', 'output_shard_size', fallback=0)
+    combine = config.get('DEFAULT', 'combine', fallback='')
+    snipeit_api.configure_from(config)
+    return config
+
+
+def pdf_settings():
+    """Returns the config.ini values printed on every document, for inventory_pdf.configure."""
+    return {
+        'issuer': issuer, 'issuer_bc': issuer_bc, 'issuer_ins': issuer_ins, 'issuer_dep': issuer_dep, 'aup_url': aup_url,
+        'large_table_rows': large_table_rows, 'form_mode': form_mode,
+    }
+
+
+def fetch_user_stock(user, headers):
+    """Fetches the assets and accessories of one user as AssetRows and AccessoryRows.
+
+    Runs on the fetch pool, so any output is collected in notes and printed
+    by the render stage to keep the log in user order. A list is None when
+    its data set could not be read.
 
-# Register the Myriad Pro fonts
-pdfmetrics.registerFont(TTFont('MyriadPro-Bold', 'fonts/MYRIADPRO-BOLD.TTF'))
-pdfmetrics.registerFont(TTFont('MyriadPro-SemiBold', 'fonts/MYRIADPRO-SEMIBOLD.TTF'))
-pdfmetrics.registerFont(TTFont('MyriadPro-Regular', 'fonts/MYRIADPRO-REGULAR.TTF'))
-
-
-# Load config from file
-config = configparser.ConfigParser()
-config.read('config.ini')
-
-# Get API endpoint and API token from config.ini these are used to create the pdf
-api_endpoint = config['DEFAULT']['api_endpoint']
-api_token = config['DEFAULT']['api_token']
-issuer = config.get('Location', 'issuer')
-issuer_bc = config.get('Location', 'issuer_bc')
-issuer_ins = config.get('Location', 'issuer_ins')
-issuer_dep = config.get('Location', 'issuer_dep')
-no_email = config.get('DEFAULT', 'no_email')
-aup_url = config.get('DEFAULT', 'aup_url')
-
-class TextField(Flowable):
-    def __init__(self, **options):
-        Flowable.__init__(self)
-        self.options = options
-        # Use Reportlab's default size if not user provided
-        self.width = options.get('width', 180)
-        self.height = options.get('height', 18)
-
-    def draw(self):
-        self.canv.saveState()
-        form = self.canv.acroForm
-        form.textfieldRelative(**self.options)
-        self.canv.restoreState()
-
-        
-class ChoiceField(Flowable):
-    def __init__(self, **options):
-        Flowable.__init__(self)
-        options['relative'] = True
-        self.options = options
-        # Use Reportlab's default size if not user provided
-        self.width = options.get('width', 80)
-        self.height = options.get('height', 18)
-
-    def draw(self):
-        self.canv.saveState()
-        form = self.canv.acroForm
-        form.choice(**self.options)
-        self.canv.restoreState()
-        
-class SignatureField(Flowable):
-    def __init__(self, title='emp_sig', width=216, height=36, background_color=colors.HexColor("#D3D3D3")):
-        super().__init__()
-        self.title = title
-        self.width = width
-        self.height = height
-        self.background_color = background_color
-        self.coordinates = None  # Store the coordinates here
-        self.page_number = None
-        
-    def draw(self):
-        canvas = self.canv
-        x, y = canvas.absolutePosition(0, 0)
-        self.coordinates = (x, y, self.width, self.height)  # Save the coordinates
-        self.page_number = self.canv.getPageNumber()
-        canvas.setFillColor(self.background_color)
-        canvas.rect(0, 0, self.width, self.height, fill=True)
-
-
-class AuthorizationField(Flowable):
-    def __init__(self, title='auth_sig', width=216, height=36, background_color=colors.HexColor("#D3D3D3")):
-        super().__init__()
-        self.title = title
-        self.width = width
-        self.height = height
-        self.background_color = background_color
-        self.coordinates = None  # Store the coordinates here
-        self.page_number = None
-    
-    def draw(self):
-        canvas = self.canv
-        x, y = canvas.absolutePosition(0, 0)
-        self.coordinates = (x, y, self.width, self.height)  # Save the coordinates
-        self.page_number = self.canv.getPageNumber()
-        canvas.setFillColor(self.background_color)
-        canvas.rect(0, 0, self.width, self.height, fill=True)
-
-
-pd.set_option('display.max_colwidth', 100)
-
-user_chk = input("Enter user name, email, or ID (Leave empty for All Users): ")
-user_chk = user_chk.strip()  # Remove leading/trailing whitespace
-
-if not user_chk:
-    user_chk = None  # Set user_chk to None if the input is empty
-    
-def getjson(resp_data):
-    """Converts response data from binary to string or JSON format.
-    
     Arguments:
-        resp_data {string or Response} -- response data returned by requests api
+        user {UserRow} -- user returned by iter_users or find_users
+        headers {dict} -- request headers including the bearer token
     """
-    if isinstance(resp_data, str):
-        # input is already a string, no need to decode
-        parsed = json.loads(resp_data)
-    elif isinstance(resp_data, requests.Response):
-        # input is a requests Response object, decode content and parse JSON
-        parsed = json.loads(resp_data.content)
-    else:
-        raise ValueError("Invalid input type, must be string or Response")
+    notes = []
+    user_id, user_name, user_email = user.id, user.name, user.email
+    if not user_email or user_email.strip() == "":
+        user_email = no_email
 
-    return parsed
+    try:
+        user_assets = api_get(api_endpoint + f'/users/{user_id}/assets', headers)
+        json_assets = getjson(user_assets)
+
+        if "rows" in json_assets:
+            with metrics.timer('rows'):
+                assets = [asset_row(asset) for asset in json_assets["rows"]]
+            if not assets:
+                notes.append("No assets found for this user")
+            else:
+                notes.append("Assets found for this user")
 
+        else:
+            assets = None
+            notes.append("No assets found in the asset data set")
+    except Exception as e:
+        assets = None
+        notes.append(f"An error occurred while retrieving assets: {str(e)}")
 
-def modify_pdf(pdf_filename, emp_sig, auth_sig):
     try:
-        with open(pdf_filename, 'rb+') as doc:
-            w = IncrementalPdfFileWriter(doc)
-        
-            # Define the position of the signature field
-            sig_field_page = emp_sig.page_number - 1
-            emp_sig_coordinates = emp_sig.coordinates
-            box_coordinates = (
-                emp_sig_coordinates[0],
-                emp_sig_coordinates[1],
-                emp_sig_coordinates[0] + emp_sig_coordinates[2],
-                emp_sig_coordinates[1] + emp_sig_coordinates[3]
-            )
-
-            # Create the signature field specification
-            sig_field_spec = SigFieldSpec(
-                sig_field_name="Sig1",
-                on_page=sig_field_page,
-                box=box_coordinates
-            )
-
-            # Append the signature field
-            append_signature_field(w, sig_field_spec)
-            
-            # Define the position of the signature field
-            auth_field_page = auth_sig.page_number - 1 
-            auth_sig_coordinates = auth_sig.coordinates
-            box_coordinates2 = (
-                auth_sig_coordinates[0],
-                auth_sig_coordinates[1],
-                auth_sig_coordinates[0] + auth_sig_coordinates[2],
-                auth_sig_coordinates[1] + auth_sig_coordinates[3]
-            )
-
-            # Create the signature field specification
-            auth_field_spec = SigFieldSpec(
-                sig_field_name="Auth1",
-                on_page=auth_field_page,
-                box=box_coordinates2
-            )
-
-            # Append the signature field
-            append_signature_field(w, auth_field_spec)
-
-            w.write_in_place()
-            print("Signature fields added successfully.")
-    except Exception as e:
-        print("Error:", str(e))
+        user_accessories = api_get(api_endpoint + f'/users/{user_id}/accessories', headers)
+        json_acc = getjson(user_accessories)
+        if "rows" in json_acc:
+            with metrics.timer('rows'):
+                accessories = [accessory_row(accessory) for accessory in json_acc["rows"]]
+            if not accessories:
+                notes.append("No accessories found for this user")
+            else:
+                notes.append("Accessories found for this user")
 
+        else:
+            accessories = None
+            notes.append("No accessories found in the accessory data")
+    except Exception as f:
+        accessories = None
+        notes.append(f"An error occurred while retrieving accessories: {str(f)}")
 
+    return user_name, user_email, user_id, assets, accessories, notes
 
 
-def generate_pdf(user_name, user_email, user_id, assetdf, accessories_df):
-    doc = SimpleDocTemplate(
-        f"{html.unescape(user_name)}_inventory.pdf", 
-        pagesize=letter, 
-        topMargin=18,  # Adjust the top margin as needed
-        bottomMargin=18,
-        leftMargin=24,
-        rightMargin=24,
-    )
+def indexed_user_stock(user, stock_index):
+    """Returns the same tuple as fetch_user_stock from a StockIndex, without API calls.
 
-        # Define styles
-    styles = getSampleStyleSheet()
-    header_style = styles['Heading1']
-    header_style.fontName = 'MyriadPro-Bold'  # Set font explicitly
-    paragraph_style = styles['BodyText']  # Paragraph style definition
-    paragraph_style.fontName = 'MyriadPro-Regular'  # Set font explicitly
-    url_style = styles['BodyText'].clone('URLStyle')
-    url_style.textColor = 'blue'
-    url_style.underline = True
-    table_style = TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), '#041E42'),
-        ('TEXTCOLOR', (0, 0), (-1, 0), '#FFFFFF'),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'MyriadPro-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), '#EEEEEE'),
-        ('FONTNAME', (0, 1), (-1, -1), 'MyriadPro-Regular'),
-        ('BOX', (0, 0), (-1, -1), 1, colors.black),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ])
-    header_table = TableStyle([
-        ('LEADING', (0, 2), (0, 6), 6),
-        ('LEADING', (0, 7), (-1, -1), 12),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'MyriadPro-Regular'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('FONTSIZE', (0, 3), (0, 3), 6),
-        ('FONTSIZE', (0, 5), (0, 5), 6),
-        ('FONTSIZE', (0, 7), (0, 7), 6),
-        ('FONTNAME', (0, 8), (0, 8), 'MyriadPro-Bold'),
-        ('WORDWRAP', (0, 10), (0, 10), True),
-    ])
-    contact_table = TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'MyriadPro-Regular'),
-        ('WIDTH', (0, 0), (-1, -1), 'auto'),
-    ])
-    
-    contact_table2 = TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'MyriadPro-Regular'),
-        ('WIDTH', (0, 0), (-1, -1), 'auto'),
-    ])
- 
-    agree_table = TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'MyriadPro-Bold'),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('SPAN', (2, 0), (4, 0)),
-        ('BOX', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTNAME', (0, 0), (-1, 0), 'MyriadPro-Regular'),
-        ('WIDTH', (0, 0), (-1, -1), 'auto'),
-    ])
-    
-    agree_table2 = TableStyle([
-
-        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'MyriadPro-Bold'),
-        ('WIDTH', (0, 0), (-1, -1), 'auto'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, 1), 7),
-        ('LINEBELOW', (0, 0), (-1, 0), 4, colors.black),  # Add a line below the first row
-        ('TOPPADDING', (0, 1), (-1, 1), 7),  # Add top padding to the second row
-    ])
-
-    # Create asset table data
-    asset_data = [['Asset Status', 'Asset Tag', 'Asset Name', 'Asset Model', 'Serial #', 'Asset Condition']]
-    for _, row in assetdf.iterrows():
-        asset_data.append(list(row))
-
-    # Create accessory table data
-    accessory_data = [['Accessory Status', 'Accessory Name', 'Accessory ID', 'Accessory Condition']]
-    for _, row in accessories_df.iterrows():
-        accessory_data.append(list(row))
-
-    # Create asset table
-    asset_table = Table(asset_data, repeatRows=1)
-    asset_table.setStyle(table_style)
-
-    # Create accessory table
-    accessory_table = Table(accessory_data, repeatRows=1)
-    accessory_table.setStyle(table_style)
-    
-    #Header Table
-    header_data = [
-        [issuer],
-        [issuer_bc],
-        [TextField(name='Name of lending issuer Instutution', tooltip='Enter the Name of lending issuer instutution', value=issuer_ins, width=200, height=16)],
-        ['Name of lending issuer Instutution'],
-        [TextField(name='Name of lending issuer Department', tooltip='Enter the Name of lending issuer department', value=issuer_dep, width=90, height=16)],
-        ['Name of issuer Lending Department'],
-        [TextField(name='Name of lending issuer Employee', tooltip='Enter the Name of lending issuer Employee', value=html.unescape(user_name), width=200, height=16)],
-        ['Name of issuer Employee'],
-        ['Equipment Loan Agreement'],
-    ]
-    header = Table(header_data)
-    header.setStyle(header_table)
-         
-    #Agreement table
-        # Add URL link
-
-    contact_data= [
-        ['issuer Employee Name:', TextField(name='employee_name', tooltip='Enter the Name of lending issuer Employee', value=html.unescape(user_name), width=200, height=16), '', 'Telephone:', TextField(name='Telephone', tooltip='Name of issuer Employee Telephone', value='775-784-6265', width=90, height=18), ''],
-    ]
-    contact_data2= [
-        ['Employee Campus Address:', ChoiceField(name='address', tooltip='Primary Equipment Address', value='NJC 109', options=['NJC 109', 'WRB 1001', 'EJC 239', 'Off Site', 'Hybrid'], width=80, height=18), '', f"{issuer_dep} Email:", TextField(name='Email', tooltip='Name of issuer Employee email', value=user_email, width=200, height=18)],
-    ]   
-    contact = Table(contact_data)
-    contact.setStyle(contact_table)
-    contact2 = Table(contact_data2)
-    contact2.setStyle(contact_table2)
-   
-    agree_deny = ChoiceField(name='CASAT_AUP', tooltip='AUP Select', value='Accept', options=['Accept', 'Deny'], width=60, height=14)
-    url_link = f'<a href="{aup_url}"><u>Casat Acceptable Use Policy</u></a>'
-
-    signature = []
-    authorization = []
-    emp_sig = SignatureField()
-    signature.append(emp_sig)
-    auth_sig = AuthorizationField()
-    authorization.append(auth_sig)
-    agree_data = [
-        ['Please read and accept the CASAT Acceptable Use Policy:', agree_deny, Paragraph(url_link, url_style), '', ''],
+    Arguments:
+        user {UserRow} -- user returned by iter_users or find_users
+        stock_index {StockIndex} -- inventory read by StockIndex.fetch
+    """
+    user_id, user_name, user_email = user.id, user.name, user.email
+    if not user_email or user_email.strip() == "":
+        user_email = no_email
+
+    assets, accessories = stock_index.stock(user_id)
+    notes = [
+        "Assets found for this user" if assets else "No assets found for this user",
+        "Accessories found for this user" if accessories else "No accessories found for this user",
     ]
-    agree_data2 = [
-        ['Digital Signature:', emp_sig, '', ''],
-        ['Approved by:', auth_sig, '', ''],
+    return user_name, user_email, user_id, assets, accessories, notes
+
+
+def fingerprint(user_name, user_email, assets, accessories):
+    """Returns a hash of everything that ends up in a user's document.
+
+    Covers the user, their AssetRows and AccessoryRows and the settings
+    printed on every document, so a change to any of them renders it again.
+    """
+    content = [
+        TEMPLATE_VERSION, issuer, issuer_bc, issuer_ins, issuer_dep, aup_url, large_table_rows, form_mode,
+        html.unescape(user_name), user_email, assets, accessories,
     ]
-    agree = Table(agree_data)
-    agree.setStyle(agree_table)
-    agree2 = Table(agree_data2)
-    agree2.setStyle(agree_table2)
-    
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class RenderManifest:
+    """Fingerprints of the documents rendered by earlier runs, stored as JSON.
+
+    A user whose fingerprint matches and whose PDF still exists does not
+    need rendering again.
+    """
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_current(self, user_id, digest, filename):
+        """Returns True when the user's PDF exists as filename and was rendered from the same content."""
+        entry = self.entries.get(str(user_id))
+        return (
+            entry is not None and entry['fingerprint'] == digest
+            and entry['file'] == filename and os.path.exists(filename)
+        )
+
+    def record(self, user_id, digest, filename):
+        """Remembers the fingerprint of a document that rendered successfully."""
+        self.entries[str(user_id)] = {'fingerprint': digest, 'file': filename}
+
+    def forget(self, user_id):
+        """Drops a user's fingerprint, so their document is rendered on the next run."""
+        self.entries.pop(str(user_id), None)
+
+    def save(self):
+        """Writes the manifest, replacing the previous one only once fully written."""
+        temp = self.path + '.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(temp, self.path)
+
+
+def fetch_in_order(fetch, items, workers, memory_ceiling=0):
+    """Runs fetch over items on a thread pool and yields the results in input order.
+
+    At most two results per worker are kept waiting, so the render stage is
+    never more than a small window behind the network. Above memory_ceiling
+    no new fetch starts until the waiting results have been handed to the
+    render stage, whose objects are freed once each PDF is written.
+
+    Arguments:
+        fetch {callable} -- function called with one item
+        items {iterable} -- items to fetch, consumed lazily
+        workers {int} -- number of fetch threads
+
+    Keyword Arguments:
+        memory_ceiling {int} -- resident memory in MB that pauses fetching, 0 for none (default: {0})
+    """
+    if memory_ceiling and rss_mb() is None:
+        print("Memory use cannot be read on this system, memory_ceiling_mb is ignored")
+        memory_ceiling = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for item in items:
+            if memory_ceiling and rss_mb() > memory_ceiling:
+                # Backpressure: drain the window before fetching more
+                metrics.count('memory_throttled_total')
+                while pending and rss_mb() > memory_ceiling:
+                    yield pending.popleft().result()
+                if rss_mb() > memory_ceiling:
+                    gc.collect()
+            pending.append(executor.submit(fetch, item))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# True in render processes, which send their metrics back with every document
+_render_worker = False
+
+
+def init_renderer(settings):
+    """Loads the PDF code and builds the template, once per render process."""
+    global _render_worker
+    import inventory_pdf
+    _render_worker = True
+    # Start from empty metrics whatever the start method copied over
+    metrics.drain()
+    inventory_pdf.configure(**settings)
+    inventory_pdf.get_template()
+
+
+def render_pool(settings):
+    """Returns a ProcessPoolExecutor of render_processes workers running init_renderer.
+
+    The workers are spawned rather than forked: fetch threads are running
+    when the pool starts, and a forked child could inherit a lock one of
+    them holds, such as the metrics lock, and wait on it forever.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    return ProcessPoolExecutor(
+        max_workers=render_processes, mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_renderer, initargs=(settings,),
+    )
 
 
-    # Create the story
-    story = []
-    
-    story.append(header)
-    story.append(Paragraph('The undersigned hereby acknowledges receipt of the equipment listed below, to be in good condition, except as otherwise noted. Nevada System of Higher Education (issuer) employee may be held responsible for damage or loss of loaned equipment.'))
-    story.append(Paragraph("Assets:", header_style))
-    story.append(asset_table)
-    story.append(Paragraph("Accessories:", header_style))
-    story.append(accessory_table)
-    story.append(contact)
-    story.append(contact2)
-    story.append(agree)
-    story.append(agree2)
-    story.append(Paragraph(f"Asset User ID: {user_id}", paragraph_style))
+def render_document(user_name, user_email, user_id, assets, accessories, settings):
+    """Renders one document, reporting a failure instead of raising it.
+
+    This is the entry point of the render processes, so it only receives
+    plain data. It returns the error message or None, the PDF, and in a
+    render process the metrics of the document for the main process to
+    merge. The main process writes the PDF to the output sink.
+    reportlab and pyhanko are imported by the first document, runs that
+    render nothing skip them.
+    """
+    import inventory_pdf
+    error = data = None
+    try:
+        inventory_pdf.configure(**settings)
+        data = inventory_pdf.render_pdf(user_name, user_email, user_id, assets, accessories)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return error, data, (metrics.drain() if _render_worker else None)
+
+
+def render_volume_document(documents, settings):
+    """Renders the documents of several users as one PDF, reporting a failure instead of raising it.
+
+    The render process counterpart of render_document for combined output,
+    returning the error message or None, the PDF and the metrics.
+    """
+    import inventory_pdf
+    error = data = None
+    try:
+        inventory_pdf.configure(**settings)
+        data = inventory_pdf.render_volume(documents)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return error, data, (metrics.drain() if _render_worker else None)
 
-            
 
+def render_volumes(stock, departments=None):
+    """Renders the users of stock into combined PDFs, one for all of them or one per department.
 
-    # Build the PDF
-    doc.build(story)
-        # Retrieve the coordinates
+    Users are collected until stock runs out, then each volume is rendered,
+    on the render processes when there are any, and written to the output
+    sink. Every user is rendered, since a volume is always written anew.
 
+    Arguments:
+        stock {iterable} -- results of fetch_user_stock or indexed_user_stock
 
-    pdf_filename = f"{html.unescape(user_name)}_inventory.pdf"
-    print(f"PDF {user_name}_inventory.pdf created successfully")
+    Keyword Arguments:
+        departments {dict} -- department name by user ID, None for a single volume (default: {None})
 
-    modify_pdf(pdf_filename, emp_sig, auth_sig)
+    Returns the IDs of the users whose volume failed.
+    """
+    volumes = {}
+    for user_name, user_email, user_id, assets, accessories, notes in stock:
+        for note in notes:
+            print(f"{html.unescape(user_name)}: {note}")
+        title = 'All users' if departments is None else (departments.get(user_id) or 'No department')
+        volumes.setdefault(title, []).append((user_name, user_email, user_id, assets, accessories))
+    if not volumes:
+        return []
 
+    try:
+        sink = snipeit_output.open_sink(output_path, output_shard_size)
+    except OSError as e:
+        print(f"Cannot write to {output_path}: {str(e)}")
+        return None
+    failed = []
+    settings = pdf_settings()
+
+    def rendered(title, result):
+        error, data, worker_metrics = result
+        if worker_metrics is not None:
+            metrics.merge(worker_metrics)
+        name = sink.volume_name(title)
+        if error is None:
+            try:
+                sink.write(name, data)
+            except OSError as e:
+                error = f"{type(e).__name__}: {e}"
+        documents = volumes[title]
+        if error is not None:
+            print(f"PDF for {title} failed: {error}")
+            failed.extend(user_id for _, _, user_id, _, _ in documents)
+            metrics.count('documents_failed_total', len(documents))
+            return
+        print(f"PDF {name} created successfully, {len(documents)} users")
+        metrics.count('documents_rendered_total', len(documents))
 
-def get_users_stock(user_chk=None):
+    try:
+        if render_processes > 0 and len(volumes) > 1:
+            with render_pool(settings) as executor:
+                rendering = {executor.submit(render_volume_document, documents, settings): title for title, documents in volumes.items()}
+                for future in as_completed(rendering):
+                    rendered(rendering[future], future.result())
+        else:
+            for title, documents in volumes.items():
+                rendered(title, render_volume_document(documents, settings))
+    except BaseException:
+        # An archive keeps its previous version
+        sink.abort()
+        raise
+    sink.commit()
+    return failed
+
+
+def get_users_stock(user_chk=None, bulk=False, force=False):
+    """Creates the PDFs of one user, of a list of users, or of all users when user_chk is empty.
+
+    Keyword Arguments:
+        user_chk {string or list} -- user name, email, or ID, or a list of them (default: {None})
+        bulk {bool} -- read the whole inventory at once instead of per user (default: {False})
+        force {bool} -- render documents whose content is unchanged too (default: {False})
+
+    Returns the IDs of the users whose PDF failed, or None when the inventory could not be read.
+    """
     headers = {'Authorization': f'Bearer {api_token}'}
-    users = requests.get(api_endpoint + '/users/', headers=headers)
-    jsondata = getjson(users)
-
-    users_jsondata = jsondata["rows"]
-    users_df = pd.DataFrame(users_jsondata, columns=['id', 'name', 'email'])
-    
-    if user_chk is not None and user_chk != "":
-        # Check if user_chk can be converted to an integer
-        if str(user_chk).isdigit():
-            user_chk = int(user_chk)  # Convert user_chk to integer
-        
-        # Filter the DataFrame to get only the row that contains the user_chk value
-        users_df = users_df[users_df['id'].isin([user_chk]) | users_df['name'].isin([user_chk]) | users_df['email'].isin([user_chk])]
-        
-        print(users_df)
-        
-    for index, user in users_df.iterrows():
-        user_id = user['id']
-        user_name = user['name']
-        user_email = user['email']
-        if pd.isnull(user_email) or user_email.strip() == "":
-            user_email = no_email
-        user_assets = requests.get(api_endpoint + f'/users/{user_id}/assets', headers=headers)
-        asset_list = []
-        
+
+    if user_chk and snipeit_output.archive_kind(output_path):
+        # An archive is written anew every run, some users' documents would replace everyone's
+        print(f"{output_path} is an archive of all users and cannot be written for only some of them, use --all or a directory --output")
+        return None
+    if user_chk and combine:
+        # A volume holds the users of the run, some users' volume would replace everyone's
+        print("Combined PDFs hold all users and cannot be created for only some of them, use --all or leave combine empty")
+        return None
+
+    if isinstance(user_chk, list) and len(user_chk) == 1:
+        user_chk = user_chk[0]
+
+    if isinstance(user_chk, list) and user_chk:
+        # Many users are resolved against one download of the directory, user IDs need none
+        index = None
+        if any(not str(query).strip().isdigit() for query in user_chk):
+            index = UserIndex(iter_users(api_endpoint, headers))
+        users = {}
+        for query in user_chk:
+            for user in resolve_users(api_endpoint, headers, query, index):
+                users.setdefault(user.id, user)
+        users = list(users.values())
+        if not users:
+            return []
+        print(format_rows(users, ['id', 'name', 'email']))
+    elif user_chk is not None and user_chk != "":
+        # Only the page holding the requested user is downloaded
+        users = resolve_users(api_endpoint, headers, user_chk)
+        if not users:
+            return []
+        print(format_rows(users, ['id', 'name', 'email']))
+    else:
+        # Users are fetched page by page, rendering starts with the first page
+        users = iter_users(api_endpoint, headers)
+
+    departments = None
+    if combine == 'department':
+        # Stock rows carry no department, it is remembered as the users stream by
+        departments = {}
+
+        def remember(users):
+            for user in users:
+                departments[user.id] = user.department
+                yield user
+        users = remember(users)
+
+    if bulk:
+        # The inventory is read in a few paged requests and grouped by user
         try:
-            json_assets = getjson(user_assets)
-
-            if "rows" in json_assets:
-                asset_jsondata = json_assets["rows"]
-                for asset in asset_jsondata:
-                    asset_tag = asset['asset_tag']
-                    asset_name = asset['name']
-                    asset_model = asset['model']['name']  # Extract the model name from the dictionary
-                    asset_model = html.unescape(asset_model)  # Decode HTML entities
-                    asset_serial = asset['serial']
-                    asset_name = html.unescape(asset_name)  # Decode HTML entities
-                    asset_status = ChoiceField(name=f'Asset Status {asset_tag}', tooltip='Status', value='Present', options=['', 'Present', 'Missing', 'Returned', 'Other'], width=80, height=14)
-                    asset_condition = ChoiceField(name=f'Asset Condition {asset_tag}', tooltip='Condition', value='Good', options=['New', 'Good', 'Fair', 'Poor', 'Other'], width=80, height=14)
-                    asset_list.append([asset_status, asset_tag, asset_name, asset_model, asset_serial, asset_condition])
-                assetdf = pd.DataFrame(asset_list, columns=['Asset Status', 'Asset Tag', 'Asset Name', 'Asset Model', 'Serial #', 'Condition'])
-                if assetdf.empty:
-                    asset_list.append(['', 'No Assets Assigned', '', '', '', ''])
-                    assetdf = pd.DataFrame(asset_list, columns=['Asset Status', 'Asset Tag', 'Asset Name', 'Asset Model', 'Serial #', 'Condition'])
-                    print("No assets found for this user")
-                else:
-                    print("Assets found for this user")
-                    
-            else:
-                asset_list.append(['', 'Error in data set', '', '', '', ''])
-                assetdf = pd.DataFrame(asset_list, columns=['Asset Status', 'Asset Tag', 'Asset Name', 'Asset Model', 'Serial #', 'Condition'])
-                print("No assets found in the asset data set")
+            with metrics.timer('fetch_bulk'):
+                stock_index = StockIndex.fetch(api_endpoint, headers)
         except Exception as e:
-            asset_list.append(['', 'Error in data set', '', '', '', ''])
-            assetdf = pd.DataFrame(asset_list, columns=['Asset Status', 'Asset Tag', 'Asset Name', 'Asset Model', 'Serial #', 'Condition'])
-            print(f"An error occurred while retrieving assets: {str(e)}")
+            print(f"An error occurred while retrieving the inventory: {str(e)}")
+            return
+        stock = (indexed_user_stock(user, stock_index) for user in users)
+    else:
+        # Fetch stage runs on the thread pool
+        def fetch(user):
+            with metrics.timer('fetch'):
+                return fetch_user_stock(user, headers)
+        stock = fetch_in_order(fetch, users, fetch_workers, memory_ceiling)
+    if combine:
+        return render_volumes(stock, departments)
+
+    failed = []
+    skipped = 0
+    manifest = RenderManifest(render_manifest)
+    settings = pdf_settings()
+    try:
+        sink = snipeit_output.open_sink(output_path, output_shard_size)
+    except OSError as e:
+        print(f"Cannot write to {output_path}: {str(e)}")
+        return
+
+    def changed(stock):
+        """Skips the users whose document is unchanged since it was last rendered."""
+        nonlocal skipped
+        for user_name, user_email, user_id, assets, accessories, notes in stock:
+            name = sink.name(user_name, user_id)
+            digest = None
+            if assets is None or accessories is None:
+                # An error document must neither replace a good one nor pass for current on the next run
+                manifest.forget(user_id)
+                if sink.exists(name):
+                    for note in notes:
+                        print(f"{html.unescape(user_name)}: {note}")
+                    failed.append((user_id, user_name, "the inventory could not be read, the previous PDF is kept"))
+                    metrics.count('documents_failed_total')
+                    continue
+            else:
+                digest = fingerprint(user_name, user_email, assets, accessories)
+                # An archive is written anew every run and needs every document
+                if not force and sink.incremental and manifest.is_current(user_id, digest, name):
+                    skipped += 1
+                    metrics.count('documents_skipped_total')
+                    continue
+            yield user_name, user_email, user_id, assets, accessories, notes, digest, name
+
+    def rendered(user_name, user_id, digest, name, result):
+        error, data, worker_metrics = result
+        if worker_metrics is not None:
+            metrics.merge(worker_metrics)
+        if error is None:
+            try:
+                sink.write(name, data)
+            except OSError as e:
+                error = f"{type(e).__name__}: {e}"
+        if error is not None:
+            failed.append((user_id, user_name, error))
+            metrics.count('documents_failed_total')
+            return
+        print(f"PDF {name} created successfully")
+        metrics.count('documents_rendered_total')
+        if digest is None:
+            # Written with the error message in place of the stock, the user still needs a real document
+            failed.append((user_id, user_name, "the inventory could not be read, the PDF shows an error"))
+        elif sink.incremental:
+            manifest.record(user_id, digest, name)
+
+    try:
+        if render_processes > 0:
+            # Render stage runs on the process pool, each worker builds the template once
+            with render_pool(settings) as executor:
+                rendering = {}
+                for user_name, user_email, user_id, assets, accessories, notes, digest, name in changed(stock):
+                    for note in notes:
+                        print(f"{html.unescape(user_name)}: {note}")
+                    future = executor.submit(render_document, user_name, user_email, user_id, assets, accessories, settings)
+                    rendering[future] = (user_name, user_id, digest, name)
+                    if len(rendering) >= render_processes * 2:
+                        done, _ = wait(rendering, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            rendered(*rendering.pop(future), future.result())
+                for future in as_completed(rendering):
+                    rendered(*rendering[future], future.result())
+        else:
+            # Render stage stays on this thread
+            for user_name, user_email, user_id, assets, accessories, notes, digest, name in changed(stock):
+                for note in notes:
+                    print(note)
+                rendered(user_name, user_id, digest, name, render_document(user_name, user_email, user_id, assets, accessories, settings))
+                print('=========================================================================================================')
+    except BaseException:
+        # Documents finished before an interruption are kept and not rendered again, an archive keeps its previous version
+        sink.abort()
+        raise
+    else:
+        sink.commit()
+    finally:
+        manifest.save()
+
+    if skipped:
+        print(f"{skipped} unchanged documents skipped, use --force to render them again")
+    for user_id, user_name, error in failed:
+        print(f"PDF for {html.unescape(user_name)} failed: {error}")
+    return [user_id for user_id, user_name, error in failed]
+
+
+def run_delta(bulk=False, force=False):
+    """Creates the PDFs of the users whose stock changed since the last delta run.
 
-        user_accessories = requests.get(api_endpoint + f'/users/{user_id}/accessories', headers=headers)
-        accessory_list = []
+    The changed users come from the Snipe-IT activity log, read from the
+    position stored in the feed state, and from the transfers recorded there
+    by transfer.py. The first run has no position yet and renders every user.
+    Changed users are read past the response cache and always rendered, a
+    change made in the Snipe-IT web interface leaves their cached stock stale.
+
+    Keyword Arguments:
+        bulk {bool} -- read the whole inventory at once on the first run (default: {False})
+        force {bool} -- render unchanged documents too on the first run (default: {False})
+
+    Returns the IDs of the users whose PDF failed, or None when the activity log or the inventory could not be read.
+    """
+    headers = {'Authorization': f'Bearer {api_token}'}
+    feed = snipeit_feed.from_config(config)
+    try:
+        changed, high_water = feed.changes(api_endpoint, headers)
+    except Exception as e:
+        print(f"An error occurred while reading the activity log: {str(e)}")
+        return None
+
+    if changed is None:
+        print("No position in the activity log yet, creating PDFs for all users")
+        failed = get_users_stock(None, bulk=bulk, force=force)
+        if failed is not None:
+            feed.advance(high_water)
+        return failed
+
+    if not changed:
+        print("No checkouts or checkins since the last run")
+        feed.advance(high_water)
+        return []
+
+    print(f"{len(changed)} users changed since the last run")
+    snipeit_api.invalidate(user_ids=changed)
+    failed = get_users_stock([str(user_id) for user_id in sorted(changed)], force=True)
+    if failed is not None:
+        feed.advance(high_water, changed - set(failed))
+    return failed
+
+
+def profile_user(user_chk, profile_out=None):
+    """Creates the PDF of one user under cProfile and prints the 25 functions with the most cumulative time.
+
+    The document is rendered on this process, so layout and signing show up
+    in the profile next to the API calls.
+
+    Arguments:
+        user_chk {string} -- user name, email, or ID
+
+    Keyword Arguments:
+        profile_out {string} -- file to save the profile to, for snakeviz or pstats (default: {None})
+    """
+    global render_processes
+    import cProfile
+    import pstats
+
+    render_processes = 0
+    profiler = cProfile.Profile()
+    profiler.runcall(get_users_stock, user_chk, force=True)
+    if profile_out:
+        profiler.dump_stats(profile_out)
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+
+
+def main(argv=None):
+    global fetch_workers, render_processes, memory_ceiling, form_mode, output_path, output_shard_size, combine
+
+    parser = argparse.ArgumentParser(description='Create digitally signable inventory PDFs for Snipe-IT users.')
+    parser.add_argument('users', nargs='*', help='user names, emails, or IDs to create PDFs for')
+    parser.add_argument('--config', default='config.ini', help='config file to read (default: config.ini)')
+    parser.add_argument('--all', action='store_true', help='create PDFs for all users without prompting')
+    parser.add_argument('--manifest', help='CSV (with a "user" column) or JSON list of users to create PDFs for')
+    parser.add_argument('--fetch-workers', type=int, help='users fetched at once (default: fetch_workers in config.ini)')
+    parser.add_argument('--render-processes', type=int, help='processes rendering PDFs (default: render_processes in config.ini)')
+    parser.add_argument('--memory-ceiling', type=int, metavar='MB', help='pause fetching above this resident memory (default: memory_ceiling_mb in config.ini)')
+    parser.add_argument('--form-mode', choices=FORM_MODES, help='dropdowns per item (rows), the same as compact hierarchical fields (compact) or one status field per table (table) (default: form_mode in config.ini, else rows)')
+    parser.add_argument('--output', help='directory, or .zip, .tar or .tar.gz archive, to write the PDFs to (default: output in config.ini, else the current directory)')
+    parser.add_argument('--shard-size', type=int, help='users per subdirectory of the output, 0 for none (default: output_shard_size in config.ini)')
+    parser.add_argument('--combine', choices=COMBINE_MODES, help='write one PDF for all users, or one per department, instead of one per user (default: combine in config.ini)')
+    parser.add_argument('--bulk', action='store_true', help='read the whole inventory in a few paged requests instead of two per user')
+    parser.add_argument('--delta', action='store_true', help='only create PDFs for users with checkouts or checkins since the last delta run')
+    parser.add_argument('--force', action='store_true', help='render every document, even when unchanged since the last run')
+    parser.add_argument('--no-cache', action='store_true', help='do not read or write the local response cache')
+    parser.add_argument('--refresh', action='store_true', help='revalidate every cached response with the server')
+    parser.add_argument('--metrics', help='write stage timings and request counters as JSON (default: metrics_json in config.ini)')
+    parser.add_argument('--metrics-textfile', help='write them in the Prometheus text format (default: metrics_textfile in config.ini)')
+    parser.add_argument('--profile', metavar='USER', help='create the PDF of one user under cProfile and print the hottest functions')
+    parser.add_argument('--profile-out', help='also save the cProfile data of --profile to this file')
+    args = parser.parse_args(argv)
+
+    user_chk = list(args.users)
+    if args.manifest:
         try:
-            json_acc = getjson(user_accessories)
-            if "rows" in json_acc:
-                accessory_jsondata = json_acc["rows"]
-                # Inside the get_users_stock function, when creating the choice field for accessories
-                accessory_count = {}
-                for accessory in accessory_jsondata:
-                    accessory_id = accessory['id']
-                    accessory_name = accessory['name']
-                    accessory_name = html.unescape(accessory_name)  # Decode HTML entities
-
-                    # Check if the accessory_id is already in the accessory_count dictionary
-                    if accessory_id in accessory_count:
-                        # Increment the count for the accessory_id
-                        accessory_count[accessory_id] += 1
-                        # Append the tick-up number to the accessory_id
-                        choice_field_name = f'Accessory Status {accessory_id}_{accessory_count[accessory_id]}'
-                        accessory_condition_field = f'Accessory Condition {accessory_id}_{accessory_count[accessory_id]}'
-                    else:
-                        # First occurrence of the accessory_id, no tick-up number needed
-                        accessory_count[accessory_id] = 1
-                        choice_field_name = f'Accessory Status {accessory_id}'
-                        accessory_condition_field = f'Accessory Condition {accessory_id}'
-                        
-                    accessory_status = ChoiceField(name= choice_field_name, tooltip='Status', value='Present', options=['', 'Present', 'Missing', 'Returned', 'Other'], width=80, height=14)
-                    accessory_condition = ChoiceField(name= accessory_condition_field, tooltip='Accessory Condition', value='Good', options=['New', 'Good', 'Fair', 'Poor', 'Other'], width=80, height=14)
-                    accessory_list.append([accessory_status, accessory_name, accessory_id, accessory_condition])
-                    accessories_df = pd.DataFrame(accessory_list, columns=['Accessory Status', 'Accessory Name', 'Accessory ID', 'Condition'])
-
-                if accessories_df.empty:
-                    accessory_list.append(['','No Accessories Assigned to user', '',''])
-                    accessories_df = pd.DataFrame(accessory_list, columns=['Accessory Status', 'Accessory Name', 'Accessory ID', 'Condition'])
-                    print("No accessories found for this user")
-                else:
-                    print("Accessories found for this user")
-                    
-            else:
-                accessory_list.append(['', 'Error in data set', '', ''])
-                accessories_df = pd.DataFrame(accessory_list, columns=['Accessory Status', 'Accessory Name', 'Accessory ID', 'Condition'])
-                print("No accessories found in the accessory data")
-        except Exception as f:
-            accessory_list.append(['', 'Error in data set', '', ''])
-            accessories_df = pd.DataFrame(accessory_list, columns=['Accessory Status', 'Accessory Name', 'Accessory ID', 'Condition'])
-            print(f"An error occurred while retrieving accessories: {str(f)}")
-        generate_pdf(user_name, user_email, user_id, assetdf, accessories_df)
-        print('=========================================================================================================')
-
-get_users_stock(user_chk)
+            user_chk += [entry['user'] for entry in read_manifest(args.manifest, ['user'])]
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    if args.all and user_chk:
+        parser.error('--all cannot be combined with users or a manifest')
+    if args.delta and (args.all or user_chk):
+        parser.error('--delta cannot be combined with --all, users or a manifest')
+    if args.profile and (args.all or args.delta or user_chk):
+        parser.error('--profile takes a single user and cannot be combined with --all, --delta, users or a manifest')
+
+    load_config(args.config)
+    if args.fetch_workers is not None:
+        fetch_workers = args.fetch_workers
+    if args.render_processes is not None:
+        render_processes = args.render_processes
+    if args.memory_ceiling is not None:
+        memory_ceiling = args.memory_ceiling
+    if args.form_mode is not None:
+        form_mode = args.form_mode
+    if args.output is not None:
+        output_path = args.output
+    if args.shard_size is not None:
+        output_shard_size = args.shard_size
+    if form_mode not in FORM_MODES:
+        parser.error(f"form_mode in {args.config} must be one of {', '.join(FORM_MODES)}")
+    if args.combine is not None:
+        combine = args.combine
+    if combine and combine not in COMBINE_MODES:
+        parser.error(f"combine in {args.config} must be empty or one of {', '.join(COMBINE_MODES)}")
+    if combine and (user_chk or args.delta or args.profile):
+        parser.error('combine writes the PDFs of all users and cannot be used with users, a manifest, --delta or --profile')
+    if snipeit_output.archive_kind(output_path) and (user_chk or args.delta or args.profile):
+        parser.error(f'{output_path} is an archive of all users and cannot be used with users, a manifest, --delta or --profile')
+    snipeit_api.configure(response_cache=snipeit_cache.from_config(config, no_cache=args.no_cache, refresh=args.refresh))
+
+    metrics_json = args.metrics or config.get('DEFAULT', 'metrics_json', fallback=None)
+    metrics_textfile = args.metrics_textfile or config.get('DEFAULT', 'metrics_textfile', fallback=None)
+    try:
+        if args.profile:
+            profile_user(args.profile, args.profile_out)
+        elif args.delta:
+            if run_delta(bulk=args.bulk, force=args.force) is None:
+                return 1
+        else:
+            if not user_chk and not args.all:
+                user_chk = input("Enter user name, email, or ID (Leave empty for All Users): ")
+                user_chk = user_chk.strip()  # Remove leading/trailing whitespace
+
+            if not user_chk:
+                user_chk = None  # Set user_chk to None if the input is empty
+
+            if get_users_stock(user_chk, bulk=args.bulk, force=args.force) is None:
+                # The inventory or the output could not be read, nothing was rendered from partial data
+                return 1
+    except snipeit_api.ApiError as e:
+        # A partial user list must not pass for the whole one, stop with an error
+        print(f"Stopped, the users could not be read: {str(e)}")
+        return 1
+    finally:
+        if metrics_json or metrics_textfile or args.profile:
+            print(metrics.report())
+        if metrics_json:
+            metrics.write_json(metrics_json)
+        if metrics_textfile:
+            metrics.write_prometheus(metrics_textfile, 'snipeit_inv_sign')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
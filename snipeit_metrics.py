@@ -0,0 +1,170 @@
+from contextlib import contextmanager
+import threading
+import json
+import time
+import sys
+import os
+
+
+class Metrics:
+    """Stage timings and counters of one run, safe to update from any thread.
+
+    A stage is a step timed once per user or per request, such as fetch,
+    layout or request. Counters hold totals such as requests, retries and
+    bytes. Render processes keep their own Metrics and send a snapshot back
+    with each document, which is merged into the one of the main process.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.stages = {}  # stage: [count, total seconds, max seconds]
+        self.counters = {}
+
+    def add(self, stage, seconds):
+        """Records one timing of stage."""
+        with self._lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                self.stages[stage] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                if seconds > entry[2]:
+                    entry[2] = seconds
+
+    def count(self, name, value=1):
+        """Adds value to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, stage):
+        """Times the body of a with block as one run of stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def drain(self):
+        """Returns the stages and counters recorded so far and starts over."""
+        with self._lock:
+            snapshot = {'stages': self.stages, 'counters': self.counters}
+            self.stages = {}
+            self.counters = {}
+        return snapshot
+
+    def merge(self, snapshot):
+        """Adds a snapshot returned by drain, usually from a render process."""
+        with self._lock:
+            for stage, (count, total, longest) in snapshot['stages'].items():
+                entry = self.stages.setdefault(stage, [0, 0.0, 0.0])
+                entry[0] += count
+                entry[1] += total
+                entry[2] = max(entry[2], longest)
+            for name, value in snapshot['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self):
+        """Returns the run as a dict of stages, counters and wall time."""
+        with self._lock:
+            stages = {
+                stage: {'count': count, 'seconds': total, 'mean': total / count, 'max': longest}
+                for stage, (count, total, longest) in sorted(self.stages.items())
+            }
+            counters = dict(sorted(self.counters.items()))
+        return {
+            'started': self.started, 'seconds': time.time() - self.started, 'peak_rss_mb': peak_rss_mb(),
+            'stages': stages, 'counters': counters,
+        }
+
+    def write_json(self, path):
+        """Writes summary() as JSON."""
+        _write(path, json.dumps(self.summary(), indent=1) + '\n')
+
+    def write_prometheus(self, path, tool):
+        """Writes the run in the Prometheus text format, for the node_exporter textfile collector.
+
+        Arguments:
+            path {string} -- file to write, ending in .prom
+            tool {string} -- value of the tool label
+        """
+        summary = self.summary()
+        label = f'tool="{tool}"'
+        lines = [
+            '# HELP snipeit_stage_seconds_total Time spent in each stage during the last run.',
+            '# TYPE snipeit_stage_seconds_total gauge',
+        ]
+        lines += [f'snipeit_stage_seconds_total{{{label},stage="{stage}"}} {s["seconds"]:.6f}' for stage, s in summary['stages'].items()]
+        lines += [
+            '# HELP snipeit_stage_runs_total Times each stage ran during the last run.',
+            '# TYPE snipeit_stage_runs_total gauge',
+        ]
+        lines += [f'snipeit_stage_runs_total{{{label},stage="{stage}"}} {s["count"]}' for stage, s in summary['stages'].items()]
+        lines += [
+            '# HELP snipeit_stage_seconds_max Longest single run of each stage during the last run.',
+            '# TYPE snipeit_stage_seconds_max gauge',
+        ]
+        lines += [f'snipeit_stage_seconds_max{{{label},stage="{stage}"}} {s["max"]:.6f}' for stage, s in summary['stages'].items()]
+        for name, value in summary['counters'].items():
+            lines += [f'# TYPE snipeit_{name} gauge', f'snipeit_{name}{{{label}}} {value}']
+        if summary['peak_rss_mb'] is not None:
+            lines += ['# TYPE snipeit_peak_rss_megabytes gauge', f'snipeit_peak_rss_megabytes{{{label}}} {summary["peak_rss_mb"]:.1f}']
+        lines += [
+            '# TYPE snipeit_run_seconds gauge',
+            f'snipeit_run_seconds{{{label}}} {summary["seconds"]:.3f}',
+            '# TYPE snipeit_last_run_timestamp_seconds gauge',
+            f'snipeit_last_run_timestamp_seconds{{{label}}} {time.time():.0f}',
+        ]
+        _write(path, '\n'.join(lines) + '\n')
+
+    def report(self):
+        """Returns the stage timings as a plain text table for printing."""
+        summary = self.summary()
+        lines = [f"{'stage':<12}{'count':>8}{'total s':>10}{'mean ms':>10}{'max ms':>10}"]
+        for stage, s in summary['stages'].items():
+            lines.append(f"{stage:<12}{s['count']:>8}{s['seconds']:>10.2f}{s['mean'] * 1000:>10.1f}{s['max'] * 1000:>10.1f}")
+        lines += [f"{name}: {value}" for name, value in summary['counters'].items()]
+        if summary['peak_rss_mb'] is not None:
+            lines.append(f"peak RSS: {summary['peak_rss_mb']:.0f} MB")
+        return '\n'.join(lines)
+
+
+def rss_mb():
+    """Returns the resident memory of this process in MB, or None where it cannot be read.
+
+    Read from /proc on Linux, or through psutil when it is installed.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def peak_rss_mb():
+    """Returns the peak resident memory of this process in MB, or None where it cannot be read."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes, except on macOS where it is in bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _write(path, text):
+    # Written next to the target and renamed, so collectors never read half a file
+    temp = path + '.tmp'
+    with open(temp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp, path)
+
+
+# Metrics of this process, updated by snipeit_api, inventory_pdf and the tools
+metrics = Metrics()
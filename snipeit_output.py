@@ -0,0 +1,183 @@
+from snipeit_metrics import metrics
+import unicodedata
+import tarfile
+import zipfile
+import html
+import time
+import io
+import os
+import re
+
+# Archive formats by file name ending, checked in order
+ARCHIVES = [
+    ('.tar.gz', 'tar'),
+    ('.tgz', 'tar'),
+    ('.tar', 'tar'),
+    ('.zip', 'zip'),
+]
+
+
+def safe_name(text, fallback='user'):
+    """Returns text, HTML escaped as returned by the API, as part of a file name safe on any file system."""
+    name = unicodedata.normalize('NFKC', html.unescape(text))
+    # Path separators, reserved characters and control characters become underscores
+    return re.sub(r'[^\w.-]+', '_', name).strip('._')[:80] or fallback
+
+
+def safe_filename(user_name, user_id):
+    """Returns the file name of a user's PDF, safe on any file system and unique per user.
+
+    Arguments:
+        user_name {string} -- user name as returned by the API, HTML escaped
+        user_id {int} -- Snipe-IT user ID
+    """
+    return f"{safe_name(user_name)}_{user_id}_inventory.pdf"
+
+
+def volume_filename(title):
+    """Returns the file name of a combined PDF, such as All_users_inventory.pdf."""
+    return f"{safe_name(title, 'volume')}_inventory.pdf"
+
+
+class DirectorySink:
+    """Writes each document as its own file below a directory.
+
+    Files are written next to their final name and renamed once complete,
+    so an interrupted run never leaves a truncated PDF behind. With
+    shard_size, users are spread over subdirectories by ID, 0000/ holding
+    IDs 0 to shard_size - 1 and so on, which keeps directory listings short
+    on network shares.
+
+    Keyword Arguments:
+        path {string} -- directory to write to, created when missing (default: {'.'})
+        shard_size {int} -- users per subdirectory, 0 for none (default: {0})
+    """
+    # Documents stay on disk, so unchanged ones need not be rendered again
+    incremental = True
+
+    def __init__(self, path='.', shard_size=0):
+        self.path = path
+        self.shard_size = shard_size
+        self._made = set()
+
+    def name(self, user_name, user_id):
+        """Returns the path of a user's document."""
+        filename = safe_filename(user_name, user_id)
+        if self.shard_size:
+            filename = os.path.join(f'{int(user_id) // self.shard_size:04d}', filename)
+        return os.path.join(self.path, filename)
+
+    def volume_name(self, title):
+        """Returns the path of a combined document, which is never sharded."""
+        return os.path.join(self.path, volume_filename(title))
+
+    def exists(self, name):
+        return os.path.exists(name)
+
+    def write(self, name, data):
+        """Writes one document under the path returned by name."""
+        directory = os.path.dirname(name)
+        if directory and directory not in self._made:
+            os.makedirs(directory, exist_ok=True)
+            self._made.add(directory)
+        temp = name + '.tmp'
+        with metrics.timer('write'):
+            with open(temp, 'wb') as f:
+                f.write(data)
+            os.replace(temp, name)
+
+    def commit(self):
+        pass
+
+    def abort(self):
+        """Ends a failed or interrupted run, the documents finished so far are complete and kept."""
+        pass
+
+
+class ArchiveSink:
+    """Streams the documents of a run into one ZIP or tar archive as they finish.
+
+    The archive is written under a temporary name and only renamed by
+    commit once the run succeeded. A failed or interrupted run calls abort,
+    which deletes it, so the archive of the previous run stays in place and
+    an archive always holds every user. PDFs are compressed already and are
+    stored in ZIP archives as they are.
+
+    Arguments:
+        path {string} -- archive to write, ending in .zip, .tar, .tar.gz or .tgz
+
+    Keyword Arguments:
+        shard_size {int} -- users per directory inside the archive, 0 for none (default: {0})
+    """
+    # Every run writes a new archive, which has to hold every document
+    incremental = False
+
+    def __init__(self, path, shard_size=0):
+        self.path = path
+        self.shard_size = shard_size
+        self.kind = archive_kind(path)
+        self._temp = path + '.tmp'
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.kind == 'zip':
+            self._archive = zipfile.ZipFile(self._temp, 'w', compression=zipfile.ZIP_STORED, allowZip64=True)
+        else:
+            self._archive = tarfile.open(self._temp, 'w:gz' if path.lower().endswith(('.gz', '.tgz')) else 'w')
+
+    def name(self, user_name, user_id):
+        """Returns the name of a user's document inside the archive."""
+        filename = safe_filename(user_name, user_id)
+        if self.shard_size:
+            filename = f'{int(user_id) // self.shard_size:04d}/{filename}'
+        return filename
+
+    def volume_name(self, title):
+        """Returns the name of a combined document inside the archive."""
+        return volume_filename(title)
+
+    def exists(self, name):
+        return False
+
+    def write(self, name, data):
+        """Appends one document to the archive."""
+        with metrics.timer('write'):
+            if self.kind == 'zip':
+                info = zipfile.ZipInfo(name, time.localtime()[:6])
+                info.external_attr = 0o644 << 16
+                self._archive.writestr(info, data)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = time.time()
+                self._archive.addfile(info, io.BytesIO(data))
+
+    def commit(self):
+        """Finishes the archive and moves it to its final name."""
+        self._archive.close()
+        os.replace(self._temp, self.path)
+
+    def abort(self):
+        """Drops the unfinished archive, leaving the previous one in place."""
+        self._archive.close()
+        os.remove(self._temp)
+
+
+def archive_kind(path):
+    """Returns 'zip' or 'tar' when path names an archive, else None."""
+    for ending, kind in ARCHIVES:
+        if path.lower().endswith(ending):
+            return kind
+    return None
+
+
+def open_sink(path='.', shard_size=0):
+    """Returns the ArchiveSink writing to path when it names an archive, else a DirectorySink.
+
+    Keyword Arguments:
+        path {string} -- directory or archive to write the documents to (default: {'.'})
+        shard_size {int} -- users per subdirectory, 0 for none (default: {0})
+    """
+    if archive_kind(path):
+        return ArchiveSink(path, shard_size)
+    return DirectorySink(path, shard_size)
@@ -0,0 +1,69 @@
+"""Fixtures running the tools against an in-process mock_snipeit server."""
+from collections import Counter
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import mock_snipeit  # noqa: E402
+import snipeit_api  # noqa: E402
+import transfer  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def api_settings(monkeypatch):
+    """Restores the module settings that load_config and configure change."""
+    for name in ('cache', '_limiter', '_session', 'request_retries', 'retry_backoff', 'user_page_size', 'max_host_requests'):
+        monkeypatch.setattr(snipeit_api, name, getattr(snipeit_api, name))
+    for name in ('config', 'api_endpoint', 'api_token', 'transfer_workers', 'feed'):
+        monkeypatch.setattr(transfer, name, getattr(transfer, name))
+    snipeit_api._host_limits.clear()
+
+
+@pytest.fixture
+def mock():
+    """A MockSnipeIT with 20 users, served on a free port as mock.endpoint."""
+    mock = mock_snipeit.MockSnipeIT(users=20, seed=1)
+    server = mock_snipeit.start_server(mock)
+    mock.endpoint = f'http://127.0.0.1:{server.server_port}/api/v1'
+    yield mock
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch, mock):
+    """Runs the test in tmp_path with a config.ini pointed at the mock, the cache off."""
+    monkeypatch.chdir(tmp_path)
+    write_config(tmp_path, mock)
+    return tmp_path
+
+
+def write_config(directory, mock, cache=False):
+    """Writes config.ini for mock without rate limit or retry delays."""
+    with open(os.path.join(directory, 'config.ini'), 'w') as f:
+        f.write(
+            f"[DEFAULT]\n"
+            f"api_endpoint = {mock.endpoint}\n"
+            f"api_token = test\n"
+            f"requests_per_minute = 0\n"
+            f"request_retries = 0\n"
+            f"user_page_size = 5\n"
+            f"[Cache]\n"
+            f"enabled = {'yes' if cache else 'no'}\n"
+            f"path = {os.path.join(directory, 'cache.sqlite')}\n"
+        )
+
+
+def held(mock, user_id):
+    """Returns the accessory IDs checked out to a user, counted per accessory."""
+    return Counter(accessory_id for accessory_id, holder in mock.checkouts.values() if holder == user_id)
+
+
+def sender_with(mock, units):
+    """Returns the first user holding at least units accessories."""
+    return next(user['id'] for user in mock.users if sum(held(mock, user['id']).values()) >= units)
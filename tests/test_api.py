@@ -0,0 +1,65 @@
+"""Paginated reads and the response cache against mock_snipeit."""
+import pytest
+
+import snipeit_api
+import snipeit_cache
+import transfer
+from conftest import held, sender_with, write_config
+
+
+@pytest.fixture
+def api(workdir):
+    """Applies the config.ini of workdir to snipeit_api."""
+    transfer.load_config()
+    return {'Authorization': 'Bearer test'}
+
+
+def test_pages_are_joined(api, mock):
+    rows = list(snipeit_api.iter_rows(mock.endpoint + '/users', api))
+    assert [row['id'] for row in rows] == [user['id'] for user in mock.users]
+
+
+@pytest.mark.parametrize('status, body', [
+    (500, {'status': 'error', 'messages': 'Server Error'}),
+    (200, {'status': 'error', 'messages': 'Unauthorized', 'payload': None}),
+], ids=['http_error', 'error_body'])
+def test_error_page_mid_pagination_raises(api, mock, monkeypatch, status, body):
+    real = mock.get
+
+    def get(path, query):
+        if path == '/users' and int(query.get('offset', ['0'])[0]) > 0:
+            return status, body
+        return real(path, query)
+    monkeypatch.setattr(mock, 'get', get)
+
+    rows = []
+    with pytest.raises(snipeit_api.ApiError):
+        for row in snipeit_api.iter_rows(mock.endpoint + '/users', api):
+            rows.append(row)
+    assert len(rows) == snipeit_api.user_page_size
+
+
+def test_move_invalidates_cache(workdir, mock):
+    write_config(workdir, mock, cache=True)
+    sender = sender_with(mock, 1)
+    receiver = sender % len(mock.users) + 1
+    accessory_id = next(iter(held(mock, sender)))
+    transfer.load_config()
+    headers = transfer.api_headers()
+    cache = snipeit_cache.from_config(transfer.config)
+    snipeit_api.configure(response_cache=cache)
+
+    accessories = mock.endpoint + f'/users/{sender}/accessories'
+    snipeit_api.api_get(accessories, headers)
+    before = snipeit_api.checkedout_index(mock.endpoint, headers, accessory_id)
+    assert cache.lookup(accessories).fresh
+    assert sender in before
+
+    transfer.main([str(sender), str(receiver), '-y', '--journal', 'journal.jsonl'])
+
+    snipeit_api.configure(response_cache=cache)
+    assert cache.lookup(accessories) is None
+    assert snipeit_api.getjson(snipeit_api.api_get(accessories, headers))['rows'] == []
+    after = snipeit_api.checkedout_index(mock.endpoint, headers, accessory_id)
+    assert sender not in after
+    assert len(after[receiver]) == held(mock, receiver)[accessory_id]
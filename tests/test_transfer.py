@@ -0,0 +1,69 @@
+"""transfer.py --resume and --rollback after a checkin or checkout raised."""
+import pytest
+import requests
+
+import transfer
+from conftest import held, sender_with
+
+
+def fail_once(monkeypatch, step, applied):
+    """Makes the first checkin or checkout raise, after the server applied it when applied is set."""
+    real = getattr(transfer, step)
+    calls = []
+
+    def flaky(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            if applied:
+                real(*args)
+            raise requests.ConnectionError('connection dropped')
+        return real(*args)
+    monkeypatch.setattr(transfer, step, flaky)
+    return real
+
+
+@pytest.mark.parametrize('applied', [False, True], ids=['not_applied', 'applied'])
+@pytest.mark.parametrize('step', ['checkin', 'checkout'])
+def test_resume_after_failed_request(workdir, mock, monkeypatch, step, applied):
+    sender = sender_with(mock, 2)
+    receiver = sender % len(mock.users) + 1
+    expected = held(mock, sender) + held(mock, receiver)
+
+    real = fail_once(monkeypatch, step, applied)
+    transfer.main([str(sender), str(receiver), '-y', '--journal', 'journal.jsonl', '--workers', '1'])
+    monkeypatch.setattr(transfer, step, real)
+    assert transfer.TransferJournal('journal.jsonl').unfinished()
+
+    transfer.main(['--journal', 'journal.jsonl', '--resume'])
+    assert held(mock, sender) == {}
+    assert held(mock, receiver) == expected
+    assert not transfer.TransferJournal('journal.jsonl').unfinished()
+
+
+@pytest.mark.parametrize('applied', [False, True], ids=['not_applied', 'applied'])
+@pytest.mark.parametrize('step', ['checkin', 'checkout'])
+def test_rollback_after_failed_request(workdir, mock, monkeypatch, step, applied):
+    sender = sender_with(mock, 2)
+    receiver = sender % len(mock.users) + 1
+    sender_before, receiver_before = held(mock, sender), held(mock, receiver)
+
+    real = fail_once(monkeypatch, step, applied)
+    transfer.main([str(sender), str(receiver), '-y', '--journal', 'journal.jsonl', '--workers', '1'])
+    monkeypatch.setattr(transfer, step, real)
+
+    transfer.main(['--journal', 'journal.jsonl', '--rollback'])
+    assert held(mock, sender) == sender_before
+    assert held(mock, receiver) == receiver_before
+    assert not transfer.TransferJournal('journal.jsonl').unfinished()
+
+
+def test_unfinished_journal_blocks_new_transfer(workdir, mock, monkeypatch):
+    sender = sender_with(mock, 2)
+    receiver = sender % len(mock.users) + 1
+    real = fail_once(monkeypatch, 'checkout', False)
+    transfer.main([str(sender), str(receiver), '-y', '--journal', 'journal.jsonl', '--workers', '1'])
+    monkeypatch.setattr(transfer, 'checkout', real)
+    moved = held(mock, receiver)
+
+    transfer.main([str(receiver), str(sender), '-y', '--journal', 'journal.jsonl'])
+    assert held(mock, receiver) == moved
@@ -1,106 +1,377 @@
-import requests
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import namedtuple
+from snipeit_api import getjson, api_get, api_post, invalidate, iter_users, resolve_users, read_manifest, checkedout_index, UserIndex, asset_row, accessory_row, format_rows
+import snipeit_api
+import snipeit_cache
+import snipeit_feed
+from snipeit_metrics import metrics
 import configparser
+import threading
+import argparse
 import json
 import html
+import time
+import sys
+import os
 
-# Load config from file
-config = configparser.ConfigParser()
-config.read('config.ini')
+# Settings from config.ini, read by load_config when the tool starts
+config = None
+api_endpoint = None
+api_token = None
+# Accessories moved at once, each one is a checkin followed by a checkout
+transfer_workers = 4
+# Users whose stock changed are queued here for snipeit_inv_sign.py --delta
+feed = None
 
-# Get API endpoint and API token from config
-api_endpoint = config['DEFAULT']['api_endpoint']
-api_token = config['DEFAULT']['api_token']
+def load_config(path='config.ini'):
+    """Reads config.ini into the module settings and the shared API settings.
 
-# Set the maximum column width
-pd.set_option('display.max_colwidth', 100)
+    Keyword Arguments:
+        path {string} -- config file to read (default: {'config.ini'})
+    """
+    global config, api_endpoint, api_token, transfer_workers, feed
+    config = configparser.ConfigParser()
+    config.read(path)
+
+    # Get API endpoint and API token from config
+    api_endpoint = config['DEFAULT']['api_endpoint']
+    api_token = config['DEFAULT']['api_token']
+    transfer_workers = config.getint('DEFAULT', 'transfer_workers', fallback=4)
+    feed = snipeit_feed.from_config(config)
+    snipeit_api.configure_from(config)
+    return config
+
+
+# One accessory unit to move from its sender to the receiver, with the receiver's pivot IDs of that accessory when it was planned
+TransferOp = namedtuple('TransferOp', ['pivot_id', 'accessory_id', 'accessory_name', 'sender_id', 'receiver_id', 'receiver_had'], defaults=[()])
+
+
+class TransferJournal:
+    """Append-only record of every planned move, so an interrupted run can resume or roll back.
+
+    Each line of the file is a JSON object holding a TransferOp and its state:
+    planned, checked_in, done, checkin_failed, checkout_failed or rolled_back,
+    or checkin_unknown and checkout_unknown when the request raised and the
+    server may or may not have acted on it. The state of an operation is the
+    last one recorded for its pivot ID.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.ops = {}
+        self.states = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as journal:
+                for line in journal:
+                    if line.strip():
+                        entry = json.loads(line)
+                        op = TransferOp(**entry['op'])
+                        self.ops[op.pivot_id] = op
+                        self.states[op.pivot_id] = entry['state']
+
+    def record(self, op, state, message=None):
+        """Appends the new state of an operation and flushes it to disk."""
+        entry = {'op': op._asdict(), 'state': state, 'time': time.time()}
+        if message:
+            entry['message'] = message
+        with self._lock:
+            self.ops[op.pivot_id] = op
+            self.states[op.pivot_id] = state
+            with open(self.path, 'a') as journal:
+                journal.write(json.dumps(entry) + '\n')
+                journal.flush()
+                os.fsync(journal.fileno())
+
+    def with_state(self, *states):
+        """Returns the operations whose current state is one of states."""
+        return [op for pivot_id, op in self.ops.items() if self.states[pivot_id] in states]
+
+    def unfinished(self):
+        """Returns the operations that may have been checked in from the sender but not checked out to the receiver.
+
+        Planned operations are included, an interrupted run may have sent
+        their checkin without recording it.
+        """
+        return self.with_state('planned', 'checkin_unknown', 'checked_in', 'checkout_failed', 'checkout_unknown')
+
+    def reset(self):
+        """Empties the journal before a new transfer."""
+        with self._lock:
+            self.ops.clear()
+            self.states.clear()
+            open(self.path, 'w').close()
+
+
+def api_headers():
+    return {'Authorization': f'Bearer {api_token}'}
+
+
+def check_response(resp):
+    """Returns the error message of a Snipe-IT response, or None when it succeeded."""
+    if not resp.ok:
+        return f"HTTP {resp.status_code}"
+    try:
+        body = getjson(resp)
+    except ValueError:
+        return "Invalid JSON response"
+    if body.get('status') != 'success':
+        return str(body.get('messages') or body.get('status'))
+    return None
+
+
+def checkin(headers, pivot_id):
+    return check_response(api_post(api_endpoint + f'/accessories/{pivot_id}/checkin', headers))
+
+
+def checkout(headers, accessory_id, user_id):
+    return check_response(api_post(api_endpoint + f'/accessories/{accessory_id}/checkout', headers, {"assigned_to": user_id}))
+
+
+def record_change(op):
+    """Drops the cached responses touched by a move and queues both users for new PDFs."""
+    invalidate(user_ids=[op.sender_id, op.receiver_id], accessory_ids=[op.accessory_id])
+    feed.touch([op.sender_id, op.receiver_id])
+
+
+def run_transfer(headers, op, journal, checked_in=False):
+    """Moves one accessory unit, recording each step in the journal.
+
+    Returns the error message or None.
 
-def getjson(resp_data):
-    """Converts response data from binary to string or JSON format.
-    
     Arguments:
-        resp_data {string or Response} -- response data returned by requests api
+        headers {dict} -- request headers including the bearer token
+        op {TransferOp} -- unit to move
+        journal {TransferJournal} -- journal of the current transfer
+
+    Keyword Arguments:
+        checked_in {bool} -- the unit was already checked in by an interrupted run (default: {False})
     """
-    if isinstance(resp_data, str):
-        # input is already a string, no need to decode
-        parsed = json.loads(resp_data)
-    elif isinstance(resp_data, requests.Response):
-        # input is a requests Response object, decode content and parse JSON
-        parsed = json.loads(resp_data.content)
-    else:
-        raise ValueError("Invalid input type, must be string or Response")
+    if not checked_in:
+        try:
+            error = checkin(headers, op.pivot_id)
+        except Exception as e:
+            # The checkin may have reached the server, settle_unknown checks before anything is sent again
+            journal.record(op, 'checkin_unknown', str(e))
+            raise
+        if error is not None:
+            journal.record(op, 'checkin_failed', error)
+            return error
+        journal.record(op, 'checked_in')
 
-    return parsed
-user_1 = input("Enter sender's name , email, or ID: ")
-user_1 = user_1.strip()  # Remove leading/trailing whitespace
+    try:
+        error = checkout(headers, op.accessory_id, op.receiver_id)
+    except Exception as e:
+        record_change(op)
+        journal.record(op, 'checkout_unknown', str(e))
+        raise
+    # Both users and the holder list changed
+    record_change(op)
+    if error is not None:
+        journal.record(op, 'checkout_failed', error)
+        return error
+    journal.record(op, 'done')
+    return None
 
-user_2 = input("Enter receiver's name, email, or ID: ")
-user_2 = user_2.strip()  # Remove leading/trailing whitespace
 
+def run_transfers(headers, ops, journal, resumed=()):
+    """Runs the planned moves on a bounded thread pool and prints the outcome of each one.
 
-def get_users_stock(user_1, user_2):
-    headers = {'Authorization': f'Bearer {api_token}'}
-    users = requests.get(api_endpoint + '/users/', headers=headers)
-    jsondata = getjson(users)
+    Arguments:
+        headers {dict} -- request headers including the bearer token
+        ops {list} -- TransferOps still held by the sender
+        journal {TransferJournal} -- journal of the current transfer
 
-    users_jsondata = jsondata["rows"]
-    users_df = pd.DataFrame(users_jsondata, columns=['id', 'name', 'email'])
+    Keyword Arguments:
+        resumed {list} -- TransferOps checked in by an interrupted run (default: {()})
+    """
+    failed = 0
+    with ThreadPoolExecutor(max_workers=transfer_workers) as executor:
+        futures = {executor.submit(run_transfer, headers, op, journal): op for op in ops}
+        for op in resumed:
+            futures[executor.submit(run_transfer, headers, op, journal, True)] = op
+        for future in as_completed(futures):
+            op = futures[future]
+            try:
+                error = future.result()
+            except Exception as e:
+                error = str(e)
+            if error is None:
+                metrics.count('moves_total')
+                print(f"Moved {op.accessory_name} (Pivot ID {op.pivot_id})")
+            else:
+                failed += 1
+                metrics.count('moves_failed_total')
+                print(f"Failed to move {op.accessory_name} (Pivot ID {op.pivot_id}): {error}")
+    print(f"{len(futures) - failed} of {len(futures)} accessories moved")
+    if failed:
+        print(f"Failed moves are recorded in {journal.path}, run again with --resume or --rollback")
 
-    if str(user_1).isdigit():
-            user_1 = int(user_1)  # Convert user_chk to integer
-        
-    # Filter the DataFrame to get only the row that contains the user_chk value
-    sender = users_df[users_df['id'].isin([user_1]) | users_df['name'].isin([user_1]) | users_df['email'].isin([user_1])]
-    sender_name = sender.iloc[0]['name']  # Access the name value of the first row
+
+def delivered(ops, received):
+    """Returns the moves of ops planned together, each group with the number of units it delivered.
+
+    ops are the moves of one accessory to one receiver, in planning order,
+    whose checkout was sent. Moves planned together share the receiver's
+    pivot IDs at planning time, so the units they delivered are those the
+    receiver holds now but did not hold then, and that the next group, if
+    any, already found with them.
+
+    Arguments:
+        ops {list} -- TransferOps of one accessory and receiver
+        received {list} -- pivot IDs the receiver holds of the accessory now
+    """
+    groups = []
+    for op in ops:
+        if not groups or set(groups[-1][0].receiver_had) != set(op.receiver_had):
+            groups.append([])
+        groups[-1].append(op)
+    counts = []
+    for number, group in enumerate(groups):
+        new = set(received) - set(group[0].receiver_had)
+        if number + 1 < len(groups):
+            new &= set(groups[number + 1][0].receiver_had)
+        counts.append((group, len(new)))
+    return counts
+
+
+def settle_unknown(headers, journal):
+    """Records whether the server acted on the checkins and checkouts whose request raised.
+
+    A planned or checkin_unknown move whose pivot ID the sender still holds
+    was never checked in and stays planned, otherwise it is checked_in. A
+    checkout_unknown move is done when the receiver holds a unit it did not
+    have when the move was planned, otherwise it is checked_in and its
+    checkout is sent again. Nothing is sent before the holder lists are read.
+
+    Arguments:
+        headers {dict} -- request headers including the bearer token
+        journal {TransferJournal} -- journal of the interrupted transfer
+    """
+    unknown = journal.with_state('planned', 'checkin_unknown', 'checkout_unknown')
+    if not unknown:
+        return
+    holders = {}
+    for accessory_id in dict.fromkeys(op.accessory_id for op in unknown):
+        holders[accessory_id] = checkedout_index(api_endpoint, headers, accessory_id, use_cache=False)
+
+    pairs = {}
+    for op in journal.with_state('done', 'checkout_unknown'):
+        if op.accessory_id in holders:
+            pairs.setdefault((op.accessory_id, op.receiver_id), []).append(op)
+    for (accessory_id, receiver_id), ops in pairs.items():
+        for group, count in delivered(ops, holders[accessory_id].get(receiver_id, [])):
+            # Units delivered beyond the moves already done belong to the checkouts that raised
+            count -= sum(1 for op in group if journal.states[op.pivot_id] == 'done')
+            for op in group:
+                if journal.states[op.pivot_id] != 'checkout_unknown':
+                    continue
+                if count > 0:
+                    count -= 1
+                    journal.record(op, 'done', 'the receiver holds the unit')
+                else:
+                    journal.record(op, 'checked_in', 'the receiver does not hold the unit')
+
+    for op in journal.with_state('planned', 'checkin_unknown'):
+        if op.pivot_id in holders[op.accessory_id].get(op.sender_id, []):
+            if journal.states[op.pivot_id] != 'planned':
+                journal.record(op, 'planned', 'the sender still holds the unit')
+        else:
+            journal.record(op, 'checked_in', 'the unit is no longer checked out to the sender')
+
+
+def rollback_transfers(journal):
+    """Returns every accessory moved by the journal's transfer to its sender."""
+    headers = api_headers()
+    settle_unknown(headers, journal)
+    for op in journal.with_state('planned'):
+        # Never checked in, the sender still holds it
+        journal.record(op, 'rolled_back', 'never moved')
+
+    done = journal.with_state('done')
+    holders = {}
+    for accessory_id in dict.fromkeys(op.accessory_id for op in done):
+        holders[accessory_id] = checkedout_index(api_endpoint, headers, accessory_id, use_cache=False)
+
+    for op in done + journal.with_state('checked_in', 'checkout_failed'):
+        error = None
+        if journal.states[op.pivot_id] == 'done':
+            # The receiver's checkout has a new pivot ID, take one of theirs for this accessory
+            pivot_ids = holders[op.accessory_id].get(op.receiver_id, [])
+            if not pivot_ids:
+                print(f"{op.accessory_name} is no longer checked out to the receiver, skipped")
+                continue
+            error = checkin(headers, pivot_ids.pop(0))
+        if error is None:
+            error = checkout(headers, op.accessory_id, op.sender_id)
+        record_change(op)
+        if error is None:
+            journal.record(op, 'rolled_back')
+            print(f"Returned {op.accessory_name} to the sender")
+        else:
+            print(f"Failed to return {op.accessory_name}: {error}")
+
+
+def get_users_stock(user_1, user_2, journal, confirm=True, index=None):
+    """Moves every accessory of the sender user_1 to the receiver user_2.
+
+    Arguments:
+        user_1 {string} -- sender's name, email, or ID
+        user_2 {string} -- receiver's name, email, or ID
+        journal {TransferJournal} -- journal of the current run
+
+    Keyword Arguments:
+        confirm {bool} -- ask before moving anything (default: {True})
+        index {UserIndex} -- index of the whole directory used to resolve both users (default: {None})
+    """
+    headers = api_headers()
+
+    # Look up both users on the server, or in the index, instead of scanning the directory
+    sender = resolve_users(api_endpoint, headers, user_1, index)
+    receiver = resolve_users(api_endpoint, headers, user_2, index)
+    if not sender or not receiver:
+        print("Skipping...")
+        return
+
+    # A name shared by several users cannot tell which one is meant, ask for an email or ID instead
+    ambiguous = False
+    for query, users in ((user_1, sender), (user_2, receiver)):
+        if len(users) > 1:
+            ambiguous = True
+            print(f"{query} matches {len(users)} users, use their email or ID:")
+            print(format_rows(users, ['id', 'name', 'email']))
+    if ambiguous:
+        print("Skipping...")
+        return
+
+    sender_name = sender[0].name
     print(f"Move accessories from {sender_name}")
 
-    if str(user_2).isdigit():
-            user_2 = int(user_2)  # Convert user_chk to integer
-        
-    # Filter the DataFrame to get only the row that contains the user_chk value
-    receiver = users_df[users_df['id'].isin([user_2]) | users_df['name'].isin([user_2]) | users_df['email'].isin([user_2])]
-    for index, user in receiver.iterrows():
-        receiver_id = user['id']
-        receiver_name = user['name']     
+    receiver_id = receiver[0].id
+    receiver_name = receiver[0].name
     print(f"To: {receiver_name}")
 
-    confirm = input("Is this correct? (Type 'y' for yes or any other input to exit): ")
-    if confirm.lower() in ['y', 'yes']:
-        # Continue with further processing or actions
-        # ...
-        pass
-    else:
-        print("Exiting...")
-        exit()
-
-    for index, user in sender.iterrows():
-        user_id = user['id']
-        user_name = user['name']
-        user_email = user['email']
+    if confirm:
+        answer = input("Is this correct? (Type 'y' for yes or any other input to skip): ")
+        if answer.lower() not in ['y', 'yes']:
+            print("Skipping...")
+            return
+
+    for user_id, user_name, user_email, _department in sender:
         print(f"User Name: {html.unescape(user_name)}, User Email: {user_email}, User ID: {user_id}")
         print('---------------------------------------------------------------------------------------------------------')
         
-        user_assets = requests.get(api_endpoint + f'/users/{user_id}/assets', headers=headers)
+        # Moves are planned from the server's current state, never from the cache
+        user_assets = api_get(api_endpoint + f'/users/{user_id}/assets', headers, use_cache=False)
 
         try:
             json_assets = getjson(user_assets)
 
             if "rows" in json_assets:
-                asset_jsondata = json_assets["rows"]
-                asset_list = []
-                for asset in asset_jsondata:
-                    asset_tag = asset['asset_tag']
-                    asset_name = asset['name']
-                    asset_model = asset['model']['name']  # Extract the model name from the dictionary
-                    asset_model = html.unescape(asset_model) #Decode HTML entities
-                    asset_serial = asset['serial']
-                    asset_name = html.unescape(asset_name)  # Decode HTML entities
-                    asset_list.append([asset_tag, asset_name, asset_model, asset_serial])
-                assetdf = pd.DataFrame(asset_list, columns=['Asset Tag', 'Asset Name', 'Asset Model', 'Serial #'])
-                if assetdf.empty:
+                asset_list = [asset_row(asset) for asset in json_assets["rows"]]
+                if not asset_list:
                     print("No assets found for this user")
                 else:
-                    print(assetdf)
+                    print(format_rows(asset_list, ['Asset Tag', 'Asset Name', 'Asset Model', 'Serial #']))
             else:
                 print("No assets found in the asset data set")           
         except Exception as e:                
@@ -108,43 +379,41 @@ def get_users_stock(user_1, user_2):
         
         print('---------------------------------------------------------------------------------------------------------')
 
-        user_accessories = requests.get(api_endpoint + f'/users/{user_id}/accessories', headers=headers)
+        user_accessories = api_get(api_endpoint + f'/users/{user_id}/accessories', headers, use_cache=False)
 
         try:
             json_acc = getjson(user_accessories)
             if "rows" in json_acc:
                 accessory_jsondata = json_acc["rows"]
-                accessory_list = []
-                for accessory in accessory_jsondata:
-                    accessory_id = accessory['id']
-                    accessory_name = accessory['name']
-                    accessory_name = html.unescape(accessory_name)  # Decode HTML entities
-                    accessory_list.append([accessory_name, accessory_id])
-                    acc_test = requests.get(api_endpoint + f'/accessories/{accessory_id}/checkedout', headers=headers)
-                    json_acc_test = getjson(acc_test)
-                    checked_out_user = json_acc_test['rows']
-                    # Filter the dictionaries to get only the entry that contains the user_id
-                    filtered_checked_out_user = [user for user in checked_out_user if user['id'] == user_id]
-
-                    if filtered_checked_out_user:
-                        chkd_out = filtered_checked_out_user[0]  # Assuming there is only one matching entry
-                        assigned_pivot_id = chkd_out['assigned_pivot_id']
+                accessory_list = [accessory_row(accessory) for accessory in accessory_jsondata]
+
+                # Read each distinct accessory's holder list once and keep the user's pivot IDs
+                pivot_ids = {}
+                receiver_had = {}
+                for accessory_id in dict.fromkeys(accessory.id for accessory in accessory_list):
+                    holders = checkedout_index(api_endpoint, headers, accessory_id, use_cache=False)
+                    pivot_ids[accessory_id] = holders.get(user_id, [])
+                    # Tells a checkout that reached the receiver from one that did not, see settle_unknown
+                    receiver_had[accessory_id] = holders.get(receiver_id, [])
+
+                # Plan one move per unit, every unit the user holds has its own pivot ID
+                ops = []
+                for accessory_id, accessory_name in accessory_list:
+                    if pivot_ids[accessory_id]:
+                        assigned_pivot_id = pivot_ids[accessory_id].pop(0)
                         print(f"Assigned Pivot ID: {assigned_pivot_id}")
-                        checkin = requests.post(api_endpoint + f'/accessories/{assigned_pivot_id}/checkin', headers=headers)
-                        payload = {"assigned_to": receiver_id}
-                        print(checkin.text)
-                        checkout = requests.post(api_endpoint + f'/accessories/{accessory_id}/checkout', json=payload, headers=headers)
-                        print(checkout.text)
+                        ops.append(TransferOp(assigned_pivot_id, accessory_id, accessory_name, user_id, receiver_id, receiver_had[accessory_id]))
                     else:
                         print("No checked out entries found for this user")
-                        
-                accessories_df = pd.DataFrame(accessory_list, columns=['Accessory Name', 'Accessory ID'])
-                
-                if accessories_df.empty:
+
+                for op in ops:
+                    journal.record(op, 'planned')
+                run_transfers(headers, ops, journal)
+
+                if not accessory_list:
                     print("No accessories found for this user")
                 else:
-
-                    print(accessories_df)
+                    print(format_rows([[accessory.name, accessory.id] for accessory in accessory_list], ['Accessory Name', 'Accessory ID']))
             else:
                 print("No accessories found in the accessory data")
         except Exception as f:
@@ -152,5 +421,81 @@ def get_users_stock(user_1, user_2):
             
         print('=========================================================================================================')
 
-get_users_stock(user_1, user_2)
+def main(argv=None):
+    global transfer_workers
+
+    parser = argparse.ArgumentParser(description='Move all accessories of one Snipe-IT user to another.')
+    parser.add_argument('sender', nargs='?', help="sender's name, email, or ID")
+    parser.add_argument('receiver', nargs='?', help="receiver's name, email, or ID")
+    parser.add_argument('--config', default='config.ini', help='config file to read (default: config.ini)')
+    parser.add_argument('--manifest', help='CSV (with "sender" and "receiver" columns) or JSON list of pairs to transfer')
+    parser.add_argument('-y', '--yes', action='store_true', help='do not ask for confirmation')
+    parser.add_argument('--workers', type=int, help='moves run at once (default: transfer_workers in config.ini)')
+    parser.add_argument('--no-cache', action='store_true', help='do not read or write the local response cache')
+    parser.add_argument('--refresh', action='store_true', help='revalidate every cached response with the server')
+    parser.add_argument('--journal', default='transfer_journal.jsonl', help='journal of the last transfer (default: transfer_journal.jsonl)')
+    parser.add_argument('--resume', action='store_true', help='finish the moves an interrupted transfer left checked in')
+    parser.add_argument('--rollback', action='store_true', help='return the accessories moved by the last transfer to their sender')
+    parser.add_argument('--metrics', help='write stage timings and request counters as JSON (default: metrics_json in config.ini)')
+    parser.add_argument('--metrics-textfile', help='write them in the Prometheus text format (default: metrics_textfile in config.ini)')
+    args = parser.parse_args(argv)
+
+    pairs = []
+    if args.sender is not None:
+        if args.receiver is None:
+            parser.error('a receiver is needed with the sender')
+        pairs.append({'sender': args.sender, 'receiver': args.receiver})
+    if args.manifest:
+        try:
+            pairs += read_manifest(args.manifest, ['sender', 'receiver'])
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+    load_config(args.config)
+    if args.workers is not None:
+        transfer_workers = args.workers
+    snipeit_api.configure(response_cache=snipeit_cache.from_config(config, no_cache=args.no_cache, refresh=args.refresh))
+
+    metrics_json = args.metrics or config.get('DEFAULT', 'metrics_json', fallback=None)
+    metrics_textfile = args.metrics_textfile or config.get('DEFAULT', 'metrics_textfile', fallback=None)
+    try:
+        journal = TransferJournal(args.journal)
+        if args.rollback:
+            rollback_transfers(journal)
+            return
+        if args.resume:
+            # Check what the server did with the requests that raised, then finish the moves
+            settle_unknown(api_headers(), journal)
+            run_transfers(api_headers(), journal.with_state('planned'), journal, journal.with_state('checked_in', 'checkout_failed'))
+        elif journal.unfinished():
+            print(f"{len(journal.unfinished())} accessories in {args.journal} may have been checked in but not checked out.")
+            print("Run again with --resume to finish them or --rollback to return them.")
+            return
+        else:
+            journal.reset()
+
+        if not pairs and not args.resume:
+            user_1 = input("Enter sender's name , email, or ID: ")
+            user_1 = user_1.strip()  # Remove leading/trailing whitespace
+
+            user_2 = input("Enter receiver's name, email, or ID: ")
+            user_2 = user_2.strip()  # Remove leading/trailing whitespace
+            pairs.append({'sender': user_1, 'receiver': user_2})
+
+        # Many pairs are resolved against one download of the directory
+        index = UserIndex(iter_users(api_endpoint, api_headers())) if len(pairs) > 1 else None
+        for pair in pairs:
+            get_users_stock(pair['sender'], pair['receiver'], journal, confirm=not args.yes, index=index)
+    except snipeit_api.ApiError as e:
+        print(f"Stopped, a list could not be read from the API: {str(e)}")
+        return 1
+    finally:
+        if metrics_json or metrics_textfile:
+            print(metrics.report())
+        if metrics_json:
+            metrics.write_json(metrics_json)
+        if metrics_textfile:
+            metrics.write_prometheus(metrics_textfile, 'transfer')
 
+if __name__ == '__main__':
+    sys.exit(main())